@@ -1,27 +1,18 @@
 import streamlit as st
-from modules.document_loader import load_files
-from modules.vector_store import get_vector_db
-from rag_pipeline.rag_pipeline import build_rag_chain
-import requests
-from bs4 import BeautifulSoup
-import pdfplumber
-import folium
-from streamlit_folium import st_folium
-from math import radians, cos, sin, asin, sqrt
-import os
-from dotenv import load_dotenv
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules import service
+from modules.resources import init_process
+from modules.states import ALL_STATES
 import datetime
 
 # ---------------- Load Environment ---------------- #
-load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI as GeminiLLM
-except ImportError:
-    from langchain_google_genai import GoogleGenerativeAI as GeminiLLM
-
-llm = GeminiLLM(model="gemini-2.0-flash", temperature=0.4, google_api_key=api_key)
+# .env is loaded by `import modules.env` above, before any module reads its settings.
+# init_process() runs once per process (metrics endpoint, optional MAYA_WARM_UP); a flag check on later reruns.
+# Shared, process-wide resources; only chat history lives in st.session_state.
+# The UI is a thin client of modules/service.py, the same core the HTTP API (modules/api.py) serves.
+# Heavy libraries (langchain, Gemini, folium, pandas) are imported inside the section that needs them,
+# so opening Nearby Services or Alerts never loads the RAG stack.
+init_process()
 
 # ---------------- Page Setup ---------------- #
 st.set_page_config(page_title="Maya Chatbot", layout="wide")
@@ -32,149 +23,84 @@ section = st.sidebar.radio("Select Section", ["Remedies", "Schemes", "Emergency"
 context_type_map = {"Remedies": "remedies", "Schemes": "schemes", "Emergency": "emergency"}
 context_type = context_type_map.get(section, "")
 
-# ---------------- Section-Specific Files ---------------- #
-file_paths = []
-if section == "Remedies":
-    file_paths = [
-        "documents/remedies/8.1.4-Details-of-Promotional-measures-undertaken-for-each-activity.pdf",
-        "documents/remedies/Ayurvedic-Home-Remedies-English.pdf",
-        "documents/remedies/Food_Recipes_From_AYUSH.pdf"
-    ]
-elif section == "Schemes":
-    file_paths = [
-        "documents/schemes/6851513623Nutrition-support-DBT-Scheme-details.pdf",
-        "documents/schemes/97827133331523438951.pdf",
-        "documents/schemes/Ayushman Bharat Scheme.pdf",
-        "documents/schemes/general_schemes.json"
-    ]
-elif section == "Emergency":
-    file_paths = ["documents/FA-manual-1.pdf"]
-
 # ---------------- RAG Chat Sections ---------------- #
 if section in ["Remedies", "Schemes", "Emergency"]:
-    # Load or reuse vector DB
-    if f"vector_db_{section}" not in st.session_state:
-        with st.spinner(f"Loading documents for {section}..."):
-            documents = load_files(file_paths)
-            vector_db = get_vector_db(documents=documents)
-            st.session_state[f"vector_db_{section}"] = vector_db
-    else:
-        vector_db = st.session_state[f"vector_db_{section}"]
-
-    # Build or reuse RAG chain
-    if f"rag_chain_{section}" not in st.session_state:
-        st.session_state[f"rag_chain_{section}"] = build_rag_chain(vector_db, context_type=context_type)
-
-    rag_chain = st.session_state[f"rag_chain_{section}"]
+    with st.spinner(f"Loading documents for {section}..."):
+        service.load_section(context_type)
 
     # Chat history
     chat_history_key = f"chat_history_{section}"
     if chat_history_key not in st.session_state:
-        st.session_state[chat_history_key] = []
+        st.session_state[chat_history_key] = service.new_memory()
+    memory = st.session_state[chat_history_key]
 
     # Input key
     input_key = f"user_input_{section}"
     if input_key not in st.session_state:
         st.session_state[input_key] = ""
+    pending_key = f"pending_question_{section}"
+
+    def chat_bubble(role, content):
+        justify, color = ("flex-start", "#F1F1F2") if role == "user" else ("flex-end", "#E9D8FD")
+        return f"""
+                    <div style='display:flex; justify-content:{justify}; margin:5px 0;'>
+                        <div style='background-color:{color}; padding:10px; border-radius:10px; max-width:60%; text-align:left;'>{content}</div>
+                    </div>"""
 
     # Display chat
     st.subheader("Conversation with Maya")
     chat_container = st.container()
     with chat_container:
-        for msg in st.session_state[chat_history_key]:
-            if msg["role"] == "user":
-                st.markdown(f"""
-                    <div style='display:flex; justify-content:flex-start; margin:5px 0;'>
-                        <div style='background-color:#F1F1F2; padding:10px; border-radius:10px; max-width:60%; text-align:left;'>{msg['content']}</div>
-                    </div>""", unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                    <div style='display:flex; justify-content:flex-end; margin:5px 0;'>
-                        <div style='background-color:#E9D8FD; padding:10px; border-radius:10px; max-width:60%; text-align:left;'>{msg['content']}</div>
-                    </div>""", unsafe_allow_html=True)
+        for msg in memory.recent():
+            st.markdown(chat_bubble(msg["role"], msg["content"]), unsafe_allow_html=True)
 
     # ---------------- Chat Input Using Form ---------------- #
     def send_message():
         if st.session_state[input_key].strip():
             user_msg = st.session_state[input_key]
-            st.session_state[chat_history_key].append({"role": "user", "content": user_msg})
-            with st.spinner("Maya is thinking..."):
-                result = rag_chain({
-                    "question": user_msg,
-                    "chat_history": st.session_state[chat_history_key]
-                })
-                bot_response = result.content if hasattr(result, "content") else result
-                st.session_state[chat_history_key].append({"role": "assistant", "content": bot_response})
+            memory.add("user", user_msg)
+            st.session_state[pending_key] = user_msg  # answered below, streamed into the chat
             st.session_state[input_key] = ""  # clear input
 
     st.text_input("💬 Ask your question:", key=input_key, on_change=send_message)
 
+    # Stream the pending answer token by token instead of waiting behind a spinner
+    user_msg = st.session_state.pop(pending_key, None)
+    if user_msg:
+        with chat_container:
+            placeholder = st.empty()
+            placeholder.markdown(chat_bubble("assistant", "Maya is thinking..."), unsafe_allow_html=True)
+            bot_response = ""
+            try:
+                for token in service.stream_answer(context_type, user_msg, memory):
+                    bot_response += token
+                    placeholder.markdown(chat_bubble("assistant", bot_response), unsafe_allow_html=True)
+            except service.ServiceBusy as e:
+                placeholder.warning(str(e))
+
 
 
 # ---------------- Nearby Services Section ---------------- #
 if section == "Nearby Services":
+    import folium
+    from streamlit_folium import st_folium
+
     st.subheader("Find Nearby Hospitals and Clinics by PIN Code")
     pincode = st.text_input("Enter your PIN code:")
     find_clicked = st.button("Find Services")
 
     if find_clicked and pincode.strip():
         try:
-            geo_url = f"https://nominatim.openstreetmap.org/search?q={pincode}, India&format=json"
-            geo_res = requests.get(geo_url, headers={"User-Agent": "Mozilla/5.0"})
-            try:
-                geo_res_json = geo_res.json()
-            except Exception:
-                geo_res_json = []
-
-            if not geo_res_json:
+            result = service.nearby(pincode.strip())
+            if result is None:
                 st.error("❌ Invalid PIN code or location not found.")
             else:
-                lat, lon = float(geo_res_json[0]["lat"]), float(geo_res_json[0]["lon"])
-                query = f"""
-                    [out:json];
-                    (node["amenity"~"hospital|clinic"](around:5000,{lat},{lon});
-                     way["amenity"~"hospital|clinic"](around:5000,{lat},{lon});
-                     relation["amenity"~"hospital|clinic"](around:5000,{lat},{lon});
-                    );
-                    out center;
-                """
-                overpass_url = "https://overpass-api.de/api/interpreter"
-                response = requests.post(overpass_url, data=query, headers={"User-Agent": "Mozilla/5.0"})
-                try:
-                    data = response.json()
-                except Exception:
-                    st.error("Overpass API returned invalid response.")
-                    data = {"elements": []}
-
-                # Haversine function
-                def haversine(lat1, lon1, lat2, lon2):
-                    R = 6371
-                    dlat = radians(lat2 - lat1)
-                    dlon = radians(lon2 - lon1)
-                    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-                    c = 2 * asin(sqrt(a))
-                    return R * c
-
-                hospitals = []
-                for el in data.get("elements", []):
-                    lat_h = el.get("lat") or el.get("center", {}).get("lat")
-                    lon_h = el.get("lon") or el.get("center", {}).get("lon")
-                    if lat_h and lon_h:
-                        distance = haversine(lat, lon, float(lat_h), float(lon_h))
-                        hospitals.append({
-                            "name": el.get("tags", {}).get("name", "Unknown"),
-                            "lat": float(lat_h),
-                            "lon": float(lon_h),
-                            "type": el.get("tags", {}).get("amenity", "N/A"),
-                            "distance": distance
-                        })
-
-                hospitals = sorted(hospitals, key=lambda x: x["distance"])[:5]
+                lat, lon, hospitals = result
                 st.session_state["nearby_lat"] = lat
                 st.session_state["nearby_lon"] = lon
                 st.session_state["hospitals"] = hospitals
 
-        except Exception as e:   # <-- FIX: close try block properly
+        except Exception as e:
             st.error(f"Error fetching services: {e}")
 
     # Display results if already in session state
@@ -203,67 +129,43 @@ if section == "Nearby Services":
 
 # ---------------- Alerts Section ---------------- #
 if section == "Alerts":
+    import pandas as pd
+
     st.subheader("🛑 Real-Time Health Alerts (IDSP Weekly Reports)")
-    all_states = [
-        "Andhra Pradesh","Arunachal Pradesh","Assam","Bihar","Chhattisgarh","Goa","Gujarat",
-        "Haryana","Himachal Pradesh","Jharkhand","Karnataka","Kerala","Madhya Pradesh","Maharashtra",
-        "Manipur","Meghalaya","Mizoram","Nagaland","Odisha","Punjab","Rajasthan","Sikkim","Tamil Nadu",
-        "Telangana","Tripura","Uttar Pradesh","Uttarakhand","West Bengal","Delhi","Jammu & Kashmir",
-        "Ladakh","Puducherry","Chandigarh"
-    ]
-    selected_states = st.sidebar.multiselect("Select states to track:", all_states)
+    selected_states = st.sidebar.multiselect("Select states to track:", ALL_STATES)
 
+    # Reports are fetched, parsed and summarised by the offline job (python -m modules.alerts);
+    # this page only reads the precomputed results.
     try:
-        url = "https://idsp.mohfw.gov.in/index4.php?lang=1&level=0&linkid=406&lid=3689"
-        res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(res.text, "html.parser")
-        pdf_links = [a["href"] for a in soup.find_all("a", href=True) if a["href"].endswith(".pdf")]
-        if not pdf_links:
-            st.error("No reports found.")
+        alerts = service.latest_alerts(selected_states)
+        if alerts is None:
+            st.error("No reports found. Run `python -m modules.alerts` to ingest the latest IDSP report.")
         else:
-            latest_pdf = pdf_links[0]
-            if not latest_pdf.startswith("http"):
-                latest_pdf = "https://idsp.mohfw.gov.in" + latest_pdf.replace("..","")
-
-            # Cache PDF weekly
-            week_number = datetime.date.today().isocalendar()[1]
-            pdf_path = f"latest_report_week_{week_number}.pdf"
-            if not os.path.exists(pdf_path):
-                try:
-                    pdf_res = requests.get(latest_pdf)
-                    with open(pdf_path,"wb") as f:
-                        f.write(pdf_res.content)
-                except Exception as e:
-                    st.error(f"Failed to download latest report: {e}")
-                    pdf_path = None
-
-            if pdf_path and os.path.exists(pdf_path):
-                text = ""
-                try:
-                    with pdfplumber.open(pdf_path) as pdf:
-                        for page in pdf.pages:
-                            page_text = page.extract_text()
-                            if page_text:
-                                text += page_text + "\n"
-                except Exception as e:
-                    st.error(f"Error reading PDF: {e}")
-                    text = ""
-
-                for state in selected_states:
-                    state_text = "\n".join([line for line in text.splitlines() if state in line])
-                    if not state_text.strip():
-                        st.warning(f"No {state}-specific alerts found.")
+            report = alerts["report"]
+            fetched = datetime.datetime.fromtimestamp(report["fetched_at"]).strftime("%d %b %Y")
+            st.caption(f"Latest report ingested on {fetched}: {report['url']}")
+            state_alerts = alerts["states"]
+            trends = service.outbreak_trends(selected_states)
+            for state in selected_states:
+                alert = state_alerts.get(state)
+                if not alert or not alert["lines"]:
+                    st.warning(f"No {state}-specific alerts found.")
+                else:
+                    st.markdown(f"### 📰 {state} Outbreak Headlines")
+                    if alert["summary"]:
+                        st.write(alert["summary"])
                     else:
-                        st.markdown(f"### 📰 {state} Outbreak Headlines")
-                        prompt = (
-                            f"Summarize the following outbreak report into 3-5 short headlines in news style and also give short information about the headlines, no introductory line by you, just direct headlines, "
-                            f"mention disease for {state}:\n\n{state_text}"
-                        )
-                        try:
-                            summary = llm.invoke(prompt)
-                            st.write(summary.content if hasattr(summary,'content') else summary)
-                        except Exception as e:
-                            st.error(f"Error generating summary for {state}: {e}")
+                        st.info(f"Summary for {state} is not available yet.")
+                        st.text("\n".join(alert["lines"]))
+
+                # Weekly trend from the accumulated outbreak dataset
+                weekly = trends[state]["weekly"]
+                if len(weekly["weeks"]) > 1:
+                    st.caption(f"{state}: reported cases and deaths per week")
+                    st.line_chart(pd.DataFrame(
+                        {"cases": weekly["cases"], "deaths": weekly["deaths"]},
+                        index=pd.to_datetime(weekly["weeks"])
+                    ))
 
     except Exception as e:
         st.error(f"Error fetching alerts: {e}")
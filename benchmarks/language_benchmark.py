@@ -0,0 +1,111 @@
+# Compares rag_pipeline.language.detect_script_language with the langdetect-based detection it replaced:
+# per-call latency (cold and memoised) and whether repeated calls on the same input agree. It also checks
+# a set of labelled questions and exits non-zero if any label regresses.
+#
+#   python -m benchmarks.language_benchmark --repeat 200
+
+import sys
+import time
+import argparse
+import statistics
+
+from rag_pipeline.language import detect_script_language
+
+SAMPLES = [
+    "home remedy for cold",
+    "what is the eligibility for ayushman bharat",
+    "my child is choking what should I do",
+    "mujhe bukhar hai kya karu",
+    "pet mein dard ho raha hai",
+    "gharelu upay batao khansi ke liye",
+    "सर्दी का इलाज बताइए",
+    "मुझे आयुष्मान भारत योजना के बारे में बताओ",
+    "জ্বর হলে কী করব",
+    "காய்ச்சலுக்கு என்ன செய்ய வேண்டும்",
+    "hi",
+    "ok thanks",
+]
+
+# (question, expected label). English questions that mention Hindi scheme, place or herb names must stay
+# English; they were labelled Hinglish before the function-word check.
+EXPECTED_LABELS = [
+    ("what is ayushman bharat yojana", "English"),
+    ("Ayushman Bharat yojana eligibility", "English"),
+    ("how do I apply for pradhan mantri matru vandana yojana", "English"),
+    ("is janani suraksha yojana available in bihar", "English"),
+    ("benefits of tulsi and neem for cough", "English"),
+    ("haldi doodh for cold", "English"),
+    ("my pet has a fever", "English"),
+    ("do not put ice on a burn", "English"),
+    ("what is the eligibility for ayushman bharat", "English"),
+    ("mujhe bukhar hai kya karu", "Hinglish"),
+    ("pet mein dard ho raha hai", "Hinglish"),
+    ("gharelu upay batao khansi ke liye", "Hinglish"),
+    ("ayushman bharat yojana ke liye kaise apply kare", "Hinglish"),
+    ("सर्दी का इलाज बताइए", "Hindi-Devanagari"),
+]
+
+
+def langdetect_label(text):
+    # The previous implementation, kept here only for comparison.
+    from langdetect import detect
+    try:
+        lang = detect(text)
+    except Exception:
+        return "English"
+    if lang == "hi":
+        return "Hindi-Devanagari" if any('\u0900' <= c <= '\u097F' for c in text) else "Hinglish"
+    return "English" if lang == "en" else lang
+
+
+def time_calls(fn, texts, repeat):
+    timings = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            fn(text)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6, max(timings) * 1e6
+
+
+def stability(fn, texts, repeat):
+    # Number of inputs whose label changed between repeated calls.
+    return sum(1 for text in texts if len({fn(text) for _ in range(repeat)}) > 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark script/language detection against langdetect.")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    uncached = detect_script_language.__wrapped__
+    rows = [
+        ("script detector (uncached)", uncached),
+        ("script detector (memoised)", detect_script_language),
+    ]
+    try:
+        import langdetect  # noqa: F401
+        rows.append(("langdetect", langdetect_label))
+    except ImportError:
+        print("langdetect not installed, skipping the comparison.")
+
+    print(f"{'detector':<28} {'median us':>10} {'max us':>10} {'unstable':>9}")
+    for name, fn in rows:
+        median_us, max_us = time_calls(fn, SAMPLES, args.repeat)
+        print(f"{name:<28} {median_us:>10.1f} {max_us:>10.1f} {stability(fn, SAMPLES, 20):>9}")
+
+    print()
+    for text in SAMPLES:
+        other = f"   langdetect: {langdetect_label(text)}" if len(rows) == 3 else ""
+        print(f"{text[:40]:<42} {uncached(text):<18}{other}")
+
+    print()
+    failures = [(text, expected, uncached(text)) for text, expected in EXPECTED_LABELS if uncached(text) != expected]
+    for text, expected, got in failures:
+        print(f"MISLABELLED {text!r}: expected {expected}, got {got}")
+    print(f"{len(EXPECTED_LABELS) - len(failures)}/{len(EXPECTED_LABELS)} labelled questions correct")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+# Offline RAG benchmark: generates a synthetic corpus, then measures ingestion, embedding, retrieval,
+# end-to-end answer latency, peak RSS and cold-start time with a deterministic stand-in for Gemini.
+#
+#   python -m benchmarks.rag_benchmark --pdfs 20 --pages 10 --schemes 200 --output bench.json
+#   python -m benchmarks.rag_benchmark --output new.json --compare bench.json
+#
+# --embeddings hash swaps MiniLM for a deterministic hashing embedder, for machines without the model.
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+
+import numpy as np
+
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+
+VOCABULARY = (
+    "fever cough cold headache digestion acidity turmeric ginger tulsi honey neem ashwagandha "
+    "diabetes asthma burn fracture bleeding choking snakebite ambulance pregnancy nutrition "
+    "scheme eligibility benefit hospital insurance card application ration anganwadi rural "
+    "urban family income women child elderly disability treatment remedy recipe precaution"
+).split()
+STATES = ["National", "Rajasthan", "Kerala", "Bihar", "Maharashtra", "Assam", "Tamil Nadu"]
+QUESTIONS = [
+    "home remedy for cold and cough",
+    "what to do for a burn",
+    "ayushman bharat eligibility",
+    "schemes for pregnant women in Rajasthan",
+    "first aid for choking child",
+    "ginger turmeric recipe for digestion",
+]
+
+
+# ---------------- Synthetic Corpus ---------------- #
+def _sentence(rng, words=14):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + "."
+
+
+def generate_queries(n, seed=11):
+    # Distinct questions, so every timed query goes through the encoder: LazyEmbeddings memoises query
+    # embeddings, and repeating a handful of questions would mostly time memo hits.
+    rng = random.Random(seed)
+    queries = []
+    seen = set()
+    while len(queries) < n:
+        query = f"{QUESTIONS[len(queries) % len(QUESTIONS)]} {' '.join(rng.sample(VOCABULARY, 3))}"
+        if query not in seen:
+            seen.add(query)
+            queries.append(query)
+    return queries
+
+
+def generate_corpus(out_dir, n_pdfs, pages_per_pdf, n_schemes, seed=7):
+    import fitz
+
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    file_paths = []
+    for i in range(n_pdfs):
+        path = os.path.join(out_dir, f"synthetic_{i:03d}.pdf")
+        doc = fitz.open()
+        for _ in range(pages_per_pdf):
+            page = doc.new_page()
+            text = "\n\n".join(" ".join(_sentence(rng) for _ in range(4)) for _ in range(8))
+            page.insert_textbox(fitz.Rect(40, 40, page.rect.width - 40, page.rect.height - 40), text, fontsize=8)
+        doc.save(path)
+        doc.close()
+        file_paths.append(path)
+
+    schemes = [{
+        "scheme_name": f"Synthetic {rng.choice(VOCABULARY).title()} Yojana {i}",
+        "category": "Health",
+        "applicable_state": rng.choice(STATES),
+        "target_audience": _sentence(rng),
+        "eligibility": _sentence(rng, 24),
+        "benefits": _sentence(rng, 20),
+        "how_to_apply": _sentence(rng),
+        "helpline": str(1000 + i),
+    } for i in range(n_schemes)]
+    json_path = os.path.join(out_dir, "general_schemes.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(schemes, f, ensure_ascii=False, indent=1)
+    file_paths.append(json_path)
+    return file_paths
+
+
+# ---------------- Stand-ins ---------------- #
+class StubLLM:
+    # Deterministic replacement for GeminiLLM: the answer depends only on the prompt text.
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def _answer(self, prompt):
+        digest = hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()
+        rng = random.Random(digest)
+        return " ".join(rng.choice(VOCABULARY) for _ in range(60))
+
+    def invoke(self, prompt):
+        from langchain.schema import AIMessage
+        if self.delay:
+            time.sleep(self.delay)
+        return AIMessage(content=self._answer(prompt))
+
+    def stream(self, prompt):
+        from langchain.schema import AIMessageChunk
+        if self.delay:
+            time.sleep(self.delay)
+        for word in self._answer(prompt).split():
+            yield AIMessageChunk(content=word + " ")
+
+
+def make_hash_embeddings(dim=384):
+    from langchain.embeddings.base import Embeddings
+
+    class HashEmbeddings(Embeddings):
+        # Bag-of-words feature hashing; deterministic and dependency-free, not semantically meaningful.
+
+        def _embed(self, text):
+            vector = np.zeros(dim, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % dim] += 1.0
+            norm = np.linalg.norm(vector)
+            return (vector / norm if norm else vector).tolist()
+
+        def embed_documents(self, texts):
+            return [self._embed(t) for t in texts]
+
+        def embed_query(self, text):
+            return self._embed(text)
+
+    return HashEmbeddings()
+
+
+def _embeddings(kind):
+    if kind == "hash":
+        return make_hash_embeddings()
+    from modules.embeddings import LazyEmbeddings
+    return LazyEmbeddings()
+
+
+# ---------------- Measurements ---------------- #
+def _percentiles(samples):
+    values = np.array(samples) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
+
+
+def _peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def _open_chain(file_paths, persist_root, embeddings_kind):
+    from modules.vector_store import get_vector_db
+    from rag_pipeline.rag_pipeline import build_rag_chain
+
+    db = get_vector_db(section="bench", file_paths=file_paths, embeddings=_embeddings(embeddings_kind),
+                       persist_root=persist_root)
+    return db, build_rag_chain(db, context_type="remedies", llm=StubLLM())
+
+
+def cold_start_child(file_paths, persist_root, embeddings_kind):
+    # Runs in a fresh interpreter: imports, opens the existing index and answers one question.
+    _, chain = _open_chain(file_paths, persist_root, embeddings_kind)
+    chain({"question": QUESTIONS[0], "chat_history": []})
+
+
+def run(args):
+    from modules.document_loader import load_files
+    from modules.vector_store import get_vector_db
+    from rag_pipeline.retrieval import HybridRetriever
+    from rag_pipeline.rag_pipeline import build_rag_chain
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="maya-bench-")
+    corpus_dir = os.path.join(work_dir, "corpus")
+    persist_root = os.path.join(work_dir, "chroma_db")
+    file_paths = generate_corpus(corpus_dir, args.pdfs, args.pages, args.schemes)
+    results = {
+        "config": {
+            "pdfs": args.pdfs, "pages": args.pages, "schemes": args.schemes, "queries": args.queries,
+            "embeddings": args.embeddings, "distinct_queries": True, "python": platform.python_version(), "cpus": os.cpu_count(),
+        }
+    }
+
+    start = time.perf_counter()
+    documents = load_files(file_paths)
+    elapsed = time.perf_counter() - start
+    results["ingest"] = {"documents": len(documents), "seconds": elapsed, "docs_per_sec": len(documents) / elapsed}
+
+    start = time.perf_counter()
+    db = get_vector_db(section="bench", file_paths=file_paths, embeddings=_embeddings(args.embeddings),
+                       persist_root=persist_root)
+    elapsed = time.perf_counter() - start
+    chunks = db._collection.count()
+    results["embed"] = {"chunks": chunks, "seconds": elapsed, "chunks_per_sec": chunks / elapsed}
+
+    retriever = HybridRetriever(db)
+    timings = []
+    for question in generate_queries(args.queries, seed=11):
+        start = time.perf_counter()
+        retriever.invoke(question)
+        timings.append(time.perf_counter() - start)
+    results["retrieval"] = _percentiles(timings)
+
+    chain = build_rag_chain(db, context_type="remedies", llm=StubLLM(delay=args.llm_delay))
+    timings = []
+    for question in generate_queries(args.queries, seed=13):
+        start = time.perf_counter()
+        chain({"question": question, "chat_history": []})
+        timings.append(time.perf_counter() - start)
+    results["end_to_end"] = _percentiles(timings)
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.rag_benchmark", "--cold-start-child", persist_root,
+         "--embeddings", args.embeddings, "--files", *file_paths],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    results["cold_start"] = {"seconds": time.perf_counter() - start}
+    results["peak_rss_mb"] = _peak_rss_mb()
+    return results
+
+
+# ---------------- Reporting ---------------- #
+HEADLINE_METRICS = [
+    ("ingest", "docs_per_sec", True),
+    ("embed", "chunks_per_sec", True),
+    ("retrieval", "p50_ms", False),
+    ("retrieval", "p95_ms", False),
+    ("retrieval", "p99_ms", False),
+    ("end_to_end", "p50_ms", False),
+    ("end_to_end", "p99_ms", False),
+    ("cold_start", "seconds", False),
+    ("peak_rss_mb", None, False),
+]
+
+
+def _metric(results, group, name):
+    value = results.get(group)
+    return value.get(name) if name and isinstance(value, dict) else value
+
+
+def report(results, baseline=None):
+    for group, name, higher_is_better in HEADLINE_METRICS:
+        label = f"{group}.{name}" if name else group
+        value = _metric(results, group, name)
+        line = f"{label:<24} {value:>12.3f}"
+        if baseline is not None:
+            before = _metric(baseline, group, name)
+            if before:
+                change = (value - before) / before * 100
+                better = change > 0 if higher_is_better else change < 0
+                line += f"   {change:+7.1f}% {'better' if better else 'worse'} (was {before:.3f})"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for ingestion, retrieval and the RAG chain.")
+    parser.add_argument("--pdfs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--schemes", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="simulated LLM latency in seconds")
+    parser.add_argument("--embeddings", choices=["minilm", "hash"], default="minilm")
+    parser.add_argument("--work-dir", help="keep the corpus and index here instead of a temp dir")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--cold-start-child", help=argparse.SUPPRESS)
+    parser.add_argument("--files", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.cold_start_child:
+        cold_start_child(args.files, args.cold_start_child, args.embeddings)
+        return 0
+
+    results = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# Cold-start benchmark for the Streamlit app: imports what each section of app.py needs in a fresh
+# interpreter under `python -X importtime` and reports total import time, the slowest packages, wall time
+# and peak RSS per section. The "shell" target is what every rerun and every section pays for; the
+# others add one section's own imports on top of it.
+#
+#   python -m benchmarks.startup_benchmark --repeat 5 --output startup.json
+#   python -m benchmarks.startup_benchmark --output new.json --compare startup.json
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+SHELL = ["streamlit", "modules.env", "modules.service", "modules.resources", "modules.states"]
+TARGETS = {
+    "shell": SHELL,
+    "nearby": SHELL + ["folium", "streamlit_folium", "modules.nearby", "modules.http_client"],
+    "alerts": SHELL + ["pandas", "modules.alert_store", "modules.outbreak_store"],
+    "rag": SHELL + ["rag_pipeline.rag_pipeline", "modules.vector_store", "modules.embeddings",
+                    "modules.document_loader"],
+}
+
+CHILD = """
+import json, resource, sys
+missing = []
+for name in {modules!r}:
+    try:
+        __import__(name)
+    except ImportError as e:
+        missing.append(f"{{name}}: {{e}}")
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"peak_rss_mb": rss / (1024 * 1024 if sys.platform == "darwin" else 1024), "missing": missing}}))
+"""
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time:       412 |       1290 |   langchain.schema"; the indentation of
+    # the name is the nesting depth. Self times are summed per top-level package.
+    per_package = defaultdict(int)
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|", 2)
+            self_us = int(self_us)
+        except ValueError:
+            continue
+        total_us += self_us
+        per_package[name.strip().split(".")[0]] += self_us
+    return total_us, per_package
+
+
+def run_target(modules):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(modules=modules)],
+        capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    total_us, per_package = parse_importtime(proc.stderr)
+    child = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "import_ms": total_us / 1000,
+        "wall_ms": wall * 1000,
+        "peak_rss_mb": child["peak_rss_mb"],
+        "missing": child["missing"],
+        "packages_ms": {name: us / 1000 for name, us in per_package.items()},
+    }
+
+
+def run(targets, repeat):
+    # Best of `repeat` runs per target; the first run also pays for a cold OS file cache.
+    results = {}
+    for target in targets:
+        runs = [run_target(TARGETS[target]) for _ in range(repeat)]
+        best = min(runs, key=lambda r: r["import_ms"])
+        best["wall_ms"] = min(r["wall_ms"] for r in runs)
+        results[target] = best
+    return results
+
+
+def report(results, top, baseline=None):
+    print(f"{'target':<8} {'import ms':>10} {'wall ms':>10} {'peak RSS MB':>12}")
+    for target, result in results.items():
+        line = f"{target:<8} {result['import_ms']:>10.1f} {result['wall_ms']:>10.1f} {result['peak_rss_mb']:>12.1f}"
+        before = (baseline or {}).get(target)
+        if before and before.get("import_ms"):
+            change = (result["import_ms"] - before["import_ms"]) / before["import_ms"] * 100
+            line += f"   {change:+7.1f}% import time (was {before['import_ms']:.1f})"
+        print(line)
+
+    for target, result in results.items():
+        slowest = sorted(result["packages_ms"].items(), key=lambda item: -item[1])[:top]
+        print(f"\n{target}: slowest packages")
+        for name, ms in slowest:
+            print(f"  {name:<32} {ms:>9.1f} ms")
+        for missing in result["missing"]:
+            print(f"  not installed, skipped: {missing}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import cost per section of the Streamlit app.")
+    parser.add_argument("--targets", nargs="*", choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list per target")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args(argv)
+
+    results = run(args.targets, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, args.top, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# Persistent store for ingested IDSP reports and their precomputed per-state summaries.
+# Reports are keyed by the SHA-256 of the PDF, so re-running the job on an unchanged report is a no-op.
+
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+
+ALERT_STORE_DIR = os.getenv("MAYA_ALERT_STORE_DIR", "alerts_store")
+ALERT_DB_NAME = "alerts.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state_alerts (
+    report_hash TEXT NOT NULL REFERENCES reports(report_hash),
+    state TEXT NOT NULL,
+    lines TEXT NOT NULL,
+    summary TEXT,
+    PRIMARY KEY (report_hash, state)
+);
+"""
+
+
+class AlertStore:
+
+    def __init__(self, store_dir=ALERT_STORE_DIR):
+        self.store_dir = store_dir
+        self.db_path = os.path.join(store_dir, ALERT_DB_NAME)
+        os.makedirs(store_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A connection per call keeps the store safe to use from Streamlit's worker threads. The block
+        # commits (or rolls back) as one transaction and the connection is always closed afterwards.
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def has_report(self, report_hash):
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM reports WHERE report_hash = ?", (report_hash,)).fetchone()
+        return row is not None
+
+    def save_report(self, report_hash, url, state_alerts):
+        # state_alerts: {state: (lines, summary)}
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (report_hash, url, fetched_at) VALUES (?, ?, ?)",
+                (report_hash, url, time.time())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO state_alerts (report_hash, state, lines, summary) VALUES (?, ?, ?, ?)",
+                [(report_hash, state, "\n".join(lines), summary) for state, (lines, summary) in state_alerts.items()]
+            )
+
+    def unsummarised_states(self, report_hash):
+        # {state: lines} for states of this report that have alert lines but no summary yet (e.g. the LLM
+        # call failed during ingestion).
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT state, lines FROM state_alerts WHERE report_hash = ? AND summary IS NULL AND lines != ''",
+                (report_hash,)
+            ).fetchall()
+        return {state: lines.splitlines() for state, lines in rows}
+
+    def save_summaries(self, report_hash, summaries):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE state_alerts SET summary = ? WHERE report_hash = ? AND state = ?",
+                [(summary, report_hash, state) for state, summary in summaries.items()]
+            )
+
+    def latest_report(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT report_hash, url, fetched_at FROM reports ORDER BY fetched_at DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return {"report_hash": row[0], "url": row[1], "fetched_at": row[2]}
+
+    def state_alerts(self, report_hash, states):
+        if not states:
+            return {}
+        placeholders = ",".join("?" for _ in states)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT state, lines, summary FROM state_alerts WHERE report_hash = ? AND state IN ({placeholders})",
+                [report_hash, *states]
+            ).fetchall()
+        return {state: {"lines": lines.splitlines(), "summary": summary} for state, lines, summary in rows}
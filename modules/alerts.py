@@ -0,0 +1,232 @@
+# Alerts summarisation engine and offline ingestion job for the weekly IDSP report.
+# The job fetches and parses each report once, extracts its outbreak tables into typed records
+# (appended to the columnar outbreak dataset), turns each state's records into compact rows,
+# summarises every state concurrently and saves the results in the alert store, which is
+# all the Alerts page reads. Reports without recognisable tables fall back to matching text lines.
+#
+#   python -m modules.alerts                      # fetch the latest report from IDSP
+#   python -m modules.alerts --pdf report.pdf     # ingest a local PDF (e.g. a test fixture)
+
+import io
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules.alert_store import AlertStore
+from modules.states import ALL_STATES
+from modules.idsp_parser import parse_outbreak_rows, parse_report_date, format_record
+from modules.observability import get_logger, span
+
+logger = get_logger("alerts")
+
+ALERT_WORKERS = int(os.getenv("MAYA_ALERT_WORKERS", "4"))
+ALERT_RATE_PER_SEC = float(os.getenv("MAYA_ALERT_RATE_PER_SEC", "5"))
+IDSP_BASE_URL = "https://idsp.mohfw.gov.in"
+IDSP_REPORTS_URL = "https://idsp.mohfw.gov.in/index4.php?lang=1&level=0&linkid=406&lid=3689"
+
+def rows_by_state(records, states):
+    buckets = {state: [] for state in states}
+    for record in records:
+        if record.state in buckets:
+            buckets[record.state].append(format_record(record))
+    return buckets
+
+
+def split_by_state(text, states):
+    buckets = {state: [] for state in states}
+    if not states:
+        return buckets
+
+    # Longest names first so "Arunachal Pradesh" is not shadowed by a shorter alternative.
+    pattern = re.compile("|".join(re.escape(s) for s in sorted(states, key=len, reverse=True)))
+    for line in text.splitlines():
+        for state in set(pattern.findall(line)):
+            buckets[state].append(line)
+    return buckets
+
+
+def build_alert_prompt(state, state_text):
+    return (
+        f"Summarize the following outbreak report into 3-5 short headlines in news style and also give short information about the headlines, no introductory line by you, just direct headlines, "
+        f"mention disease for {state}:\n\n{state_text}"
+    )
+
+
+class RateLimiter:
+    # Spaces out call start times so bursts stay under the provider's request rate.
+
+    def __init__(self, rate_per_sec):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def summarise_state(llm, state, state_text, limiter=None):
+    if limiter is not None:
+        limiter.wait()
+    prompt = build_alert_prompt(state, state_text)
+    with span("alerts_llm_invoke", prompt_chars=len(prompt)) as s:
+        summary = llm.invoke(prompt)
+        summary = summary.content if hasattr(summary, 'content') else summary
+        s.set(response_chars=len(summary))
+    return summary
+
+
+def summarise_states(llm, state_lines, max_workers=ALERT_WORKERS, rate_per_sec=ALERT_RATE_PER_SEC):
+    # Yields (state, summary, error) in completion order; states without lines are skipped.
+    jobs = {state: "\n".join(lines) for state, lines in state_lines.items() if lines}
+    if not jobs:
+        return
+
+    limiter = RateLimiter(rate_per_sec)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = {
+            executor.submit(summarise_state, llm, state, state_text, limiter): state
+            for state, state_text in jobs.items()
+        }
+        for future in as_completed(futures):
+            state = futures[future]
+            try:
+                yield state, future.result(), None
+            except Exception as e:
+                yield state, None, e
+
+
+# ---------------- Offline Ingestion Job ---------------- #
+LISTING_TTL = 6 * 3600
+REPORT_TTL = 7 * 24 * 3600
+
+
+def fetch_latest_report_url():
+    from bs4 import BeautifulSoup
+    from modules.http_client import get_client
+
+    res = get_client().get(IDSP_REPORTS_URL, ttl=LISTING_TTL)
+    soup = BeautifulSoup(res.text, "html.parser")
+    pdf_links = [a["href"] for a in soup.find_all("a", href=True) if a["href"].endswith(".pdf")]
+    if not pdf_links:
+        return None
+    latest_pdf = pdf_links[0]
+    if not latest_pdf.startswith("http"):
+        latest_pdf = IDSP_BASE_URL + latest_pdf.replace("..","")
+    return latest_pdf
+
+
+def download_report(url):
+    from modules.http_client import get_client
+
+    res = get_client().get(url, ttl=REPORT_TTL, deadline=120)
+    res.raise_for_status()
+    return res.content
+
+
+def extract_report(pdf_bytes):
+    # Returns (text, tables) from a single pass over the PDF.
+    import pdfplumber
+
+    page_texts = []
+    tables = []
+    with span("alerts_pdf_parse", pdf_bytes=len(pdf_bytes)) as s:
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    page_texts.append(page_text)
+                tables.extend(page.extract_tables())
+        text = "\n".join(page_texts)
+        s.set(pages=len(page_texts), chars=len(text), tables=len(tables))
+    return text, tables
+
+
+def collect_summaries(llm, state_lines):
+    # {state: summary}; a state whose summary failed maps to None and is retried by the next run.
+    summaries = {}
+    for state, summary, error in summarise_states(llm, state_lines):
+        if error is not None:
+            logger.warning(f"Summary failed for {state}: {error}")
+        summaries[state] = summary
+    return summaries
+
+
+def ingest_report(pdf_bytes, url, llm=None, store=None, force=False, dataset=None):
+    store = store or AlertStore()
+    report_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    if store.has_report(report_hash) and not force:
+        # Already parsed: only fill in summaries that failed last time.
+        pending = store.unsummarised_states(report_hash) if llm is not None else {}
+        if not pending:
+            logger.info(f"Report {report_hash[:12]} already ingested, nothing to do.")
+            return report_hash
+        summaries = {state: summary for state, summary in collect_summaries(llm, pending).items() if summary}
+        store.save_summaries(report_hash, summaries)
+        logger.info(f"Report {report_hash[:12]} already ingested; filled {len(summaries)} of {len(pending)} missing summaries.")
+        return report_hash
+
+    text, tables = extract_report(pdf_bytes)
+    records = parse_outbreak_rows(tables, ALL_STATES)
+    if records:
+        if dataset is None:
+            from modules.outbreak_store import get_dataset
+            dataset = get_dataset()
+        # Rows without their own reporting date take the report's week from the header (or from the other
+        # rows); never the ingestion date, which would put old reports into the current week.
+        report_date = parse_report_date(text) or max((r.report_date for r in records if r.report_date), default=None)
+        added = dataset.append(report_hash, records, report_date)
+        logger.info(f"Parsed {len(records)} outbreak rows; {added} added to the outbreak dataset.")
+        state_lines = rows_by_state(records, ALL_STATES)
+    else:
+        logger.warning("No outbreak tables recognised in the report, falling back to matching text lines.")
+        state_lines = split_by_state(text, ALL_STATES)
+    summaries = collect_summaries(llm, state_lines) if llm is not None else {}
+
+    store.save_report(report_hash, url, {
+        state: (lines, summaries.get(state)) for state, lines in state_lines.items()
+    })
+    found = sum(1 for lines in state_lines.values() if lines)
+    logger.info(f"Ingested report {report_hash[:12]} from {url}: {found} states with alerts.")
+    return report_hash
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest the weekly IDSP outbreak report into the alert store.")
+    parser.add_argument("--pdf", help="ingest a local PDF instead of fetching the latest report")
+    parser.add_argument("--url", help="report URL to download instead of scraping the IDSP listing")
+    parser.add_argument("--no-summaries", action="store_true", help="store state lines only, skip LLM summaries")
+    parser.add_argument("--force", action="store_true", help="re-ingest even if the report is already stored")
+    args = parser.parse_args(argv)
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            pdf_bytes = f.read()
+        url = "file://" + os.path.abspath(args.pdf)
+    else:
+        url = args.url or fetch_latest_report_url()
+        if not url:
+            logger.error("No reports found on the IDSP listing.")
+            return 1
+        pdf_bytes = download_report(url)
+
+    llm = None
+    if not args.no_summaries:
+        from modules.resources import get_llm
+        llm = get_llm()
+
+    ingest_report(pdf_bytes, url, llm=llm, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
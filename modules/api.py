@@ -0,0 +1,196 @@
+# Async HTTP API over the same core as the Streamlit app (modules/service.py), for mobile and other clients.
+#
+#   python -m modules.api                      # or: uvicorn modules.api:app --host 0.0.0.0 --port 8000
+#
+#   POST /v1/chat/{section}     {"question": "...", "session_id": "...", "stream": true}
+#                               streams the answer as Server-Sent Events (token, done, error events)
+#   GET  /v1/schemes?q=pregnant women in Rajasthan
+#   GET  /v1/alerts?states=Kerala&states=Bihar
+#   GET  /v1/alerts/trends?states=Kerala&weeks=12
+#   GET  /v1/nearby/{pincode}
+#   GET  /healthz, /readyz, /metrics
+#
+# Run a single worker process: all models, indexes and LLM clients are loaded once per process.
+# Every Gemini call holds a slot of the shared LLM gate; when the gate and its queue are full the API
+# replies 503 with Retry-After instead of queueing without bound.
+
+import os
+import sys
+import json
+import uuid
+import asyncio
+import threading
+from typing import List, Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules import service
+from modules.resources import SECTION_FILES, init_process
+from modules.observability import get_logger, render_prometheus
+
+logger = get_logger("api")
+
+API_HOST = os.getenv("MAYA_API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("MAYA_API_PORT", "8000"))
+RETRY_AFTER_SECONDS = "2"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # The API always loads every section up front; /readyz reports when that is done.
+    init_process(warm_up_sections=list(SECTION_FILES))
+    yield
+
+
+app = FastAPI(title="Maya API", lifespan=lifespan)
+
+
+class ChatRequest(BaseModel):
+    question: str
+    session_id: Optional[str] = None
+    stream: bool = True
+
+
+# ---------------- Chat ---------------- #
+def _start_answer(loop, section, question, memory):
+    # The chain and the LLM client are blocking, so each answer is produced on its own thread and handed
+    # to the event loop through a queue. Setting `stop` (client gone) ends generation at the next token.
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        tokens = service.stream_answer(section, question, memory)
+        try:
+            for token in tokens:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, ("token", token))
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            tokens.close()
+
+    threading.Thread(target=produce, daemon=True, name="maya-answer").start()
+    return queue, stop
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _raise_for(error):
+    if isinstance(error, service.ServiceBusy):
+        raise HTTPException(status_code=503, detail=str(error), headers={"Retry-After": RETRY_AFTER_SECONDS})
+    logger.error(f"Answer failed: {error}")
+    raise HTTPException(status_code=500, detail="Failed to generate an answer.")
+
+
+@app.post("/v1/chat/{section}")
+async def chat(section: str, request: ChatRequest):
+    if section not in SECTION_FILES:
+        raise HTTPException(status_code=404, detail=f"Unknown section: {section}")
+    if not request.question.strip():
+        raise HTTPException(status_code=422, detail="Question is empty.")
+
+    session_id = request.session_id or uuid.uuid4().hex
+    memory = service.session_memory(section, session_id)
+    # service.stream_answer takes the question back out if the request fails before the first token.
+    memory.add("user", request.question)
+    queue, stop = _start_answer(asyncio.get_running_loop(), section, request.question, memory)
+
+    # Wait for the first event before answering, so a full LLM queue still becomes a proper 503.
+    kind, value = await queue.get()
+    if kind == "error":
+        stop.set()
+        _raise_for(value)
+
+    if not request.stream:
+        parts = []
+        while kind == "token":
+            parts.append(value)
+            kind, value = await queue.get()
+        if kind == "error":
+            _raise_for(value)
+        return JSONResponse({"answer": "".join(parts), "session_id": session_id})
+
+    async def events():
+        nonlocal kind, value
+        try:
+            while kind == "token":
+                yield _sse("token", {"text": value})
+                kind, value = await queue.get()
+            if kind == "error":
+                logger.error(f"Answer failed mid-stream: {value}")
+                yield _sse("error", {"detail": "Failed to generate an answer."})
+            else:
+                yield _sse("done", {"session_id": session_id})
+        finally:
+            stop.set()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Session-Id": session_id})
+
+
+@app.get("/v1/schemes")
+def schemes(q: str):
+    # Structured lookup only, no LLM: matching scheme records by name, state, beneficiary or benefit.
+    # A plain def, so FastAPI runs the fuzzy matching on its threadpool rather than the event loop.
+    return service.lookup_schemes(q)
+
+
+# ---------------- Alerts and Nearby ---------------- #
+@app.get("/v1/alerts")
+async def alerts(states: List[str] = Query(default=[])):
+    result = await run_in_threadpool(service.latest_alerts, states)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No IDSP report has been ingested yet.")
+    return result
+
+
+@app.get("/v1/alerts/trends")
+async def alert_trends(states: List[str] = Query(default=[]), weeks: int = Query(default=12, ge=1, le=520)):
+    return await run_in_threadpool(service.outbreak_trends, states, weeks)
+
+
+@app.get("/v1/nearby/{pincode}")
+async def nearby(pincode: str):
+    try:
+        result = await run_in_threadpool(service.nearby, pincode.strip())
+    except Exception as e:
+        logger.error(f"Nearby lookup failed: {e}")
+        raise HTTPException(status_code=502, detail="Error fetching services.")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Invalid PIN code or location not found.")
+    lat, lon, hospitals = result
+    return {"lat": lat, "lon": lon, "hospitals": hospitals}
+
+
+# ---------------- Health ---------------- #
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    status = service.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def main():
+    import uvicorn
+    uvicorn.run(app, host=API_HOST, port=API_PORT, workers=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
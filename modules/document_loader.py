@@ -1,21 +1,53 @@
 import os
-import glob
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from collections import deque
+from itertools import islice
 from langchain.schema import Document
-from langchain_community.document_loaders import PyPDFLoader
 import fitz
+from modules.observability import get_logger
+
+logger = get_logger("document_loader")
+
+PAGES_PER_TASK = 16
+INGEST_WORKERS = int(os.getenv("MAYA_INGEST_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _page_count(file_path):
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def _extract_pages(file_path, start, end):
+    # Runs in a worker process; returns plain tuples so results pickle cheaply.
+    pages = []
+    with fitz.open(file_path) as doc:
+        for page_number in range(start, min(end, doc.page_count)):
+            pages.append((page_number + 1, doc[page_number].get_text()))
+    return pages
+
+
+def _page_documents(file_path, pages):
+    source = os.path.basename(file_path)
+    for page_number, text in pages:
+        if text.strip():
+            yield Document(page_content=text, metadata={"source": source, "page": page_number})
+
+
+def iter_pdf_pages(file_path):
+    with fitz.open(file_path) as doc:
+        for page_number, page in enumerate(doc, 1):
+            yield from _page_documents(file_path, [(page_number, page.get_text())])
+
 
 def load_pdf(file_path):
-    doc=fitz.open(file_path)
-    text=""
-    for page in doc:
-        text+=page.get_text()
-    metadata= {"source": os.path.basename(file_path)}
-    print(f"[DEBUG] PDF loaded with {len(text)} characters.")
-    return Document(page_content=text, metadata=metadata)
+    return list(iter_pdf_pages(file_path))
+
 
 def load_json(file_path):
-    
+
     with open(file_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
@@ -23,51 +55,106 @@ def load_json(file_path):
 
     if isinstance(data, list):
         for i, entry in enumerate(data):
-            
+
             content_lines = []
             for key, value in entry.items():
-                
+
                 pretty_key = key.replace('_', ' ').title()
                 content_lines.append(f"**{pretty_key}:** {value}")
 
             content = "\n".join(content_lines)
 
-            if "rajasthan" in content.lower():
-                print(f"[DEBUG] 🔍 Entry {i} contains 'Rajasthan'.")
-
             documents.append(Document(
                 page_content=content,
-                metadata={"source": os.path.basename(file_path)}
+                metadata={"source": os.path.basename(file_path), "entry": i}
             ))
-            print(f"[INFO] Loaded {len(documents)} documents from JSON.")
+        logger.info(f"Loaded {len(documents)} documents from JSON.")
     else:
-        print(f"[ERROR] Expected a list of entries, got {type(data)}")
+        logger.error(f"Expected a list of entries, got {type(data)}")
 
     return documents
 
-def load_files(file_paths):
-    
-    documents = []
 
+def _tasks(file_paths):
+    # (file_path, start, end) in input order: one task per PDF page range, (file_path, None, None) per JSON file.
     for file_path in file_paths:
         if not os.path.exists(file_path):
-            print(f"[Warning] File not found: {file_path}")
-            continue
+            logger.warning(f"File not found: {file_path}")
+        elif file_path.endswith('.pdf'):
+            for start in range(0, _page_count(file_path), PAGES_PER_TASK):
+                yield file_path, start, start + PAGES_PER_TASK
+        elif file_path.endswith('.json'):
+            yield file_path, None, None
+        else:
+            logger.warning(f"Unsupported file type: {file_path}")
 
-        if file_path.endswith('.pdf'):
-            doc = load_pdf(file_path)
-            print(f"[DEBUG] 📄 PDF doc preview: {doc.page_content[:200]}...\n")
-            documents.append(doc)
 
-        elif file_path.endswith('.json'):
-            json_docs = load_json(file_path)
-            for i, d in enumerate(json_docs[:2]):
-                print(f"[DEBUG] 📝 JSON doc {i} preview: {d.page_content[:200]}...\n")
-            documents.extend(json_docs)
+def _task_documents(file_path, start, pages):
+    if start is None:
+        return load_json(file_path)
+    return _page_documents(file_path, pages)
 
-        else:
-            print(f"[WARNING] Unsupported file type: {file_path}")
 
-    print(f"[INFO] ✅ Total documents loaded: {len(documents)}")
+def _iter_pooled(tasks, executor, max_workers):
+    # Page ranges are parsed in the process pool with a bounded number of tasks in flight, and results
+    # are yielded in task order, so memory stays flat however large the PDFs are.
+    def submit(task):
+        file_path, start, end = task
+        future = executor.submit(_extract_pages, file_path, start, end) if start is not None else None
+        return file_path, start, future
+
+    tasks = iter(tasks)
+    in_flight = deque(submit(task) for task in islice(tasks, max_workers * 2))
+    while in_flight:
+        file_path, start, future = in_flight.popleft()
+        for next_task in islice(tasks, 1):
+            in_flight.append(submit(next_task))
+        yield from _task_documents(file_path, start, future.result() if future is not None else None)
+
+
+@contextmanager
+def ingest_pool(max_workers=None):
+    # One process pool for a whole indexing run, passed to iter_documents(executor=...);
+    # None when parsing runs in-process.
+    max_workers = INGEST_WORKERS if max_workers is None else max_workers
+    if max_workers <= 1:
+        yield None
+        return
+    # Spawned, not forked: syncs start inside threaded servers (Streamlit, the warm-up thread, uvicorn),
+    # and forking a multithreaded process can deadlock the child.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        yield executor
+
 
-    return documents
\ No newline at end of file
+def iter_documents(file_paths, max_workers=None, executor=None):
+    # Documents in the order of `file_paths`. PDF page ranges go to `executor` if one is given,
+    # otherwise to a pool started for this call when there is more than one range to parse.
+    max_workers = INGEST_WORKERS if max_workers is None else max_workers
+    tasks = list(_tasks(file_paths))
+    if executor is not None:
+        yield from _iter_pooled(tasks, executor, max_workers)
+        return
+    if max_workers <= 1 or sum(1 for _, start, _ in tasks if start is not None) <= 1:
+        for file_path, start, end in tasks:
+            pages = _extract_pages(file_path, start, end) if start is not None else None
+            yield from _task_documents(file_path, start, pages)
+        return
+    with ingest_pool(max_workers) as pool:
+        yield from _iter_pooled(tasks, pool, max_workers)
+
+
+def iter_batches(items, batch_size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def load_files(file_paths):
+
+    documents = list(iter_documents(file_paths))
+    logger.info(f"✅ Total documents loaded: {len(documents)}")
+
+    return documents
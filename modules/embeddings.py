@@ -0,0 +1,210 @@
+# Pluggable embedding backends for all-MiniLM-L6-v2.
+#
+#   MAYA_EMBEDDING_BACKEND=hf    sentence-transformers on torch (default)
+#   MAYA_EMBEDDING_BACKEND=onnx  int8-quantised ONNX Runtime export of the same model, no torch needed
+#
+# Both produce L2-normalised 384-d vectors. The ONNX export matches the torch model to a cosine
+# similarity of at least ONNX_MIN_COSINE on every sample checked by `python -m modules.embeddings check`,
+# so existing Chroma collections stay usable without re-embedding.
+#
+#   python -m modules.embeddings export          # writes models/minilm-onnx-int8 (needs optimum[onnxruntime])
+#   python -m modules.embeddings check           # compares the two backends
+
+import os
+import sys
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain.embeddings.base import Embeddings
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules.observability import get_logger
+
+logger = get_logger("embeddings")
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.getenv("MAYA_EMBEDDING_BACKEND", "hf")
+EMBEDDING_BATCH_SIZE = int(os.getenv("MAYA_EMBEDDING_BATCH", "64"))
+EMBEDDING_THREADS = int(os.getenv("MAYA_EMBEDDING_THREADS", "0"))   # 0 lets the runtime decide
+ONNX_MODEL_DIR = os.getenv("MAYA_ONNX_MODEL_DIR", "models/minilm-onnx-int8")
+ONNX_MODEL_FILE = "model_quantized.onnx"
+ONNX_MIN_COSINE = 0.99
+MAX_SEQ_LENGTH = 256
+QUERY_MEMO_SIZE = int(os.getenv("MAYA_QUERY_MEMO_SIZE", "2048"))
+
+
+def load_hf_embeddings():
+    from langchain.embeddings import HuggingFaceEmbeddings
+
+    hf_token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
+    if not hf_token:
+        raise EnvironmentError("Please set the HUGGINGFACEHUB_API_TOKEN environment variable.")
+
+    if EMBEDDING_THREADS:
+        import torch
+        torch.set_num_threads(EMBEDDING_THREADS)
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE}
+    )
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, batch_size=EMBEDDING_BATCH_SIZE, threads=EMBEDDING_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run `python -m modules.embeddings export` first.")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        # Mean pooling over real tokens, then L2 normalisation, as in the sentence-transformers pipeline.
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode_batch(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._encode_batch([text])[0].tolist()
+
+
+def load_embedding_backend(backend=None):
+    backend = backend or EMBEDDING_BACKEND
+    logger.info(f"Loading '{backend}' embedding backend.")
+    if backend == "onnx":
+        return OnnxMiniLMEmbeddings()
+    if backend == "hf":
+        return load_hf_embeddings()
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+class LazyEmbeddings(Embeddings):
+    # Defers loading the embedding backend until something is actually embedded,
+    # so opening an up-to-date index never touches the model. Query embeddings are memoised:
+    # the response cache and the retriever embed the same question, and popular questions repeat.
+
+    def __init__(self, factory=load_embedding_backend, memo_size=QUERY_MEMO_SIZE):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+        self._memo_size = memo_size
+        self._memo_lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def embed_documents(self, texts):
+        return self._get_model().embed_documents(texts)
+
+    def embed_queries(self, texts):
+        # Batched embed_query: memoised questions are reused, the rest go to the model in one call.
+        with self._memo_lock:
+            vectors = [self._memo.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            computed = dict(zip(missing, self._get_model().embed_documents(missing)))
+            with self._memo_lock:
+                for text, vector in computed.items():
+                    self._memo[text] = vector
+                while len(self._memo) > self._memo_size:
+                    self._memo.popitem(last=False)
+            vectors = [computed[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text):
+        with self._memo_lock:
+            vector = self._memo.get(text)
+            if vector is not None:
+                self._memo.move_to_end(text)
+                return vector
+        vector = self._get_model().embed_query(text)
+        with self._memo_lock:
+            self._memo[text] = vector
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return vector
+
+
+# ---------------- Export and Check ---------------- #
+def export_onnx(out_dir=ONNX_MODEL_DIR):
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    export_dir = out_dir + "-fp32"
+    ORTModelForFeatureExtraction.from_pretrained(EMBEDDING_MODEL, export=True).save_pretrained(export_dir)
+    AutoTokenizer.from_pretrained(EMBEDDING_MODEL).save_pretrained(out_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(export_dir)
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=out_dir, quantization_config=config)
+    logger.info(f"Saved int8 ONNX model to {out_dir}")
+
+
+CHECK_SENTENCES = [
+    "home remedy for cold and cough",
+    "Ayushman Bharat provides a cover of Rs. 5 lakhs per family per year.",
+    "Call 108 for an ambulance and keep the person warm.",
+    "mujhe bukhar hai kya karu",
+    "Turmeric milk with honey helps a sore throat.",
+]
+
+
+def check_onnx(sentences=CHECK_SENTENCES):
+    reference = np.array(load_hf_embeddings().embed_documents(sentences))
+    candidate = np.array(OnnxMiniLMEmbeddings().embed_documents(sentences))
+    cosines = (reference * candidate).sum(axis=1)
+    for sentence, cosine in zip(sentences, cosines):
+        print(f"{cosine:.5f}  {sentence}")
+    ok = bool(cosines.min() >= ONNX_MIN_COSINE)
+    print(f"min cosine {cosines.min():.5f} ({'within' if ok else 'OUTSIDE'} tolerance {ONNX_MIN_COSINE})")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and check the ONNX embedding backend.")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--out-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_onnx(args.out_dir)
+        return 0
+    return 0 if check_onnx() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+# Loads .env into the process environment. Project modules read their MAYA_* settings when they are
+# imported, so every entry point (app.py, the API, each `python -m` job and benchmark) imports this first.
+# Existing environment variables win over .env; later imports of this module are free.
+
+from dotenv import load_dotenv
+
+load_dotenv()
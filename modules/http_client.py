@@ -0,0 +1,220 @@
+# Shared HTTP client for every outbound call (Nominatim, Overpass, IDSP listing and report downloads).
+# One keep-alive session per process, per-host concurrency limits, per-request deadlines, retry with
+# exponential backoff, and an on-disk response cache revalidated with ETag/Last-Modified.
+# Bodies are streamed in chunks and the deadline is checked between them: the read timeout only bounds
+# each socket read, so a server that keeps trickling bytes would otherwise run past the deadline.
+# Each cache entry is a single file (metadata line plus body) replaced atomically.
+
+import os
+import json
+import time
+import random
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from modules.observability import get_logger, span, inc
+
+logger = get_logger("http_client")
+
+HTTP_CACHE_DIR = os.getenv("MAYA_HTTP_CACHE_DIR", ".http_cache")
+CONNECT_TIMEOUT = float(os.getenv("MAYA_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("MAYA_HTTP_READ_TIMEOUT", "15"))
+REQUEST_DEADLINE = float(os.getenv("MAYA_HTTP_DEADLINE", "30"))
+MAX_RETRIES = int(os.getenv("MAYA_HTTP_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+HOST_CONCURRENCY = int(os.getenv("MAYA_HTTP_HOST_CONCURRENCY", "4"))
+POOL_SIZE = 16
+CHUNK_SIZE = 16 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0"
+
+
+class CachedResponse:
+    # The subset of requests.Response the callers use, for both live and cached responses.
+
+    def __init__(self, status_code, content, headers, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class HttpClient:
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, host_concurrency=HOST_CONCURRENCY):
+        self.cache_dir = cache_dir
+        self.host_concurrency = host_concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.host_concurrency)
+            return self._host_limits[host]
+
+    # ---------------- On-Disk Cache ---------------- #
+    def _cache_key(self, method, url, params, data):
+        raw = "\0".join([method, url, urlencode(sorted((params or {}).items())), str(data or "")])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, key):
+        # One file per entry: a JSON metadata line followed by the body, so the body and its ETag are
+        # always replaced together.
+        return os.path.join(self.cache_dir, key + ".cache")
+
+    def _read_cache(self, key):
+        try:
+            with open(self._cache_path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _store(self, key, meta, body):
+        # Written to a unique temp file and renamed, so concurrent writers of the same URL and crashes
+        # never leave a partial entry. A failed write only costs the cache, never the response.
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                    f.write(body)
+                os.replace(tmp_path, self._cache_path(key))
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache entry {key[:12]}: {e}")
+
+    def _write_cache(self, key, url, response, content):
+        meta = {
+            "url": url,
+            "status_code": response.status_code,
+            "headers": {k.lower(): v for k, v in response.headers.items() if k.lower() in ("etag", "last-modified", "content-type")},
+            "stored_at": time.time(),
+        }
+        self._store(key, meta, content)
+
+    def _touch_cache(self, key, meta, body):
+        self._store(key, dict(meta, stored_at=time.time()), body)
+
+    # ---------------- Requests ---------------- #
+    @staticmethod
+    def _read_body(response, url, deadline):
+        chunks = []
+        try:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                chunks.append(chunk)
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"Deadline exceeded while reading {url}")
+        finally:
+            response.close()
+        return b"".join(chunks)
+
+    def _send(self, method, url, params, data, headers, deadline):
+        # Returns (response, body). Retries connection errors and retryable statuses with jittered
+        # exponential backoff, never running past the overall deadline, including while reading the body.
+        last_error = None
+        for attempt in range(MAX_RETRIES + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            limit = self._host_limit(url)
+            if not limit.acquire(timeout=remaining):
+                break
+            try:
+                response = self.session.request(
+                    method, url, params=params, data=data, headers=headers, stream=True,
+                    timeout=(min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    return response, self._read_body(response, url, deadline)
+                response.close()
+                last_error = requests.HTTPError(f"HTTP {response.status_code} from {url}")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                last_error = e
+            finally:
+                limit.release()
+
+            backoff = BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random() / 2)
+            if time.monotonic() + backoff >= deadline:
+                break
+            time.sleep(backoff)
+        raise last_error or requests.Timeout(f"Deadline exceeded for {url}")
+
+    def request(self, method, url, params=None, data=None, ttl=0, cache=True, deadline=REQUEST_DEADLINE):
+        # ttl: seconds a cached response is served without contacting the server; after that it is
+        # revalidated, and a stale copy is still served if the upstream is unreachable.
+        key = self._cache_key(method, url, params, data)
+        meta, body = self._read_cache(key) if cache else (None, None)
+        if meta is not None and time.time() - meta["stored_at"] < ttl:
+            inc("maya_http_cache_hits_total", host=urlsplit(url).netloc)
+            return CachedResponse(meta["status_code"], body, meta["headers"], from_cache=True)
+
+        headers = {}
+        if meta is not None:
+            if "etag" in meta["headers"]:
+                headers["If-None-Match"] = meta["headers"]["etag"]
+            if "last-modified" in meta["headers"]:
+                headers["If-Modified-Since"] = meta["headers"]["last-modified"]
+
+        try:
+            with span("http_request", host=urlsplit(url).netloc, revalidate=meta is not None):
+                response, content = self._send(method, url, params, data, headers, time.monotonic() + deadline)
+        except requests.RequestException as e:
+            if meta is not None:
+                logger.warning(f"{url} unreachable ({e}), serving cached copy.")
+                return CachedResponse(meta["status_code"], body, meta["headers"], from_cache=True)
+            raise
+
+        if response.status_code == 304 and meta is not None:
+            self._touch_cache(key, meta, body)
+            return CachedResponse(meta["status_code"], body, meta["headers"], from_cache=True)
+
+        if cache and response.status_code == 200:
+            self._write_cache(key, url, response, content)
+        return CachedResponse(response.status_code, content, dict(response.headers))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -0,0 +1,155 @@
+# Parser for the outbreak tables in IDSP weekly reports.
+# Each report lists outbreaks as table rows (ID, state, district, disease, cases, deaths, start and
+# reporting dates, status, comments). pdfplumber's table finder recovers the cells; this module maps
+# the columns by their header text and turns every row into a typed OutbreakRecord.
+
+import re
+import datetime
+from collections import namedtuple
+from modules.states import STATE_ALIASES
+
+OutbreakRecord = namedtuple("OutbreakRecord", [
+    "outbreak_id", "state", "district", "disease", "cases", "deaths", "start_date", "report_date", "status",
+])
+
+# Header keywords for each field, matched against lower-cased header cells in order.
+HEADER_KEYWORDS = (
+    ("outbreak_id", ("unique id", "id. no", "id no")),
+    ("state", ("state",)),
+    ("district", ("district",)),
+    ("disease", ("disease", "illness")),
+    ("cases", ("cases",)),
+    ("deaths", ("deaths",)),
+    ("start_date", ("start of outbreak", "date of start", "onset")),
+    ("report_date", ("reporting", "date of report")),
+    ("status", ("status",)),
+)
+
+_DATE_RE = re.compile(r"(\d{1,2})[./-](\d{1,2})[./-](\d{2,4})")
+_MONTHS = {name: i for i, names in enumerate((
+    ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+    ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+    ("dec", "december"),
+), 1) for name in names}
+# Reporting week in the report header, e.g. "(11th March 2024 to 17th March 2024)" or "4th Mar to 10th Mar 2024".
+_WEEK_RANGE_RE = re.compile(
+    r"\d{1,2}(?:st|nd|rd|th)?\s+[a-z]{3,9}\.?,?\s*(?:\d{4})?\s*(?:to|-|–)\s*"
+    r"(\d{1,2})(?:st|nd|rd|th)?\s+([a-z]{3,9})\.?,?\s*(\d{4})",
+    re.IGNORECASE,
+)
+_NUMERIC_RANGE_RE = re.compile(r"\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\s*(?:to|-|–)\s*(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})")
+HEADER_CHARS = 3000
+_INT_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _clean(cell):
+    return _SPACE_RE.sub(" ", cell).strip() if cell else ""
+
+
+def parse_date(text):
+    match = _DATE_RE.search(text or "")
+    if not match:
+        return None
+    day, month, year = (int(g) for g in match.groups())
+    if year < 100:
+        year += 2000
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_report_date(text):
+    # Last day of the reporting week named in the report header, or None if the header has no range.
+    header = (text or "")[:HEADER_CHARS]
+    for match in _WEEK_RANGE_RE.finditer(header):
+        day, month, year = match.groups()
+        if month.lower() in _MONTHS:
+            try:
+                return datetime.date(int(year), _MONTHS[month.lower()], int(day))
+            except ValueError:
+                continue
+    match = _NUMERIC_RANGE_RE.search(header)
+    return parse_date(match.group(1)) if match else None
+
+
+def parse_count(text):
+    # "Nil", "-" and empty cells mean no cases/deaths; "12*" or "12 (suspected)" keep the number.
+    match = _INT_RE.search(text or "")
+    return int(match.group()) if match else 0
+
+
+def normalise_state(name, states):
+    key = _clean(name).lower()
+    if not key:
+        return None
+    if key in STATE_ALIASES:
+        return STATE_ALIASES[key]
+    for state in sorted(states, key=len, reverse=True):
+        if state.lower() in key:
+            return state
+    for alias, state in STATE_ALIASES.items():
+        if alias in key:
+            return state
+    return None
+
+
+def _header_columns(row):
+    cells = [_clean(c).lower() for c in row]
+    columns = {}
+    for field, keywords in HEADER_KEYWORDS:
+        for i, cell in enumerate(cells):
+            if i not in columns.values() and any(k in cell for k in keywords):
+                columns[field] = i
+                break
+    # A header needs at least the state, disease and case columns to be an outbreak table.
+    return columns if {"state", "disease", "cases"} <= columns.keys() else None
+
+
+def parse_outbreak_rows(tables, states):
+    # `tables` is a list of tables, each a list of rows of cell strings (pdfplumber's extract_tables()).
+    # Tables continued on the next page have no header; they reuse the last header seen. Cells merged
+    # across rows (state, district) are blank after the first row and are carried forward.
+    records = []
+    columns = None
+    for table in tables:
+        state = district = None
+        for row in table:
+            header = _header_columns(row)
+            if header is not None:
+                columns = header
+                continue
+            if columns is None:
+                continue
+
+            def cell(field):
+                i = columns.get(field)
+                return _clean(row[i]) if i is not None and i < len(row) else ""
+
+            disease = cell("disease")
+            if not disease:
+                continue
+            state = normalise_state(cell("state"), states) or state
+            district = cell("district") or district
+            if state is None:
+                continue
+            records.append(OutbreakRecord(
+                outbreak_id=cell("outbreak_id"),
+                state=state,
+                district=district or "",
+                disease=disease.title(),
+                cases=parse_count(cell("cases")),
+                deaths=parse_count(cell("deaths")),
+                start_date=parse_date(cell("start_date")),
+                report_date=parse_date(cell("report_date")),
+                status=cell("status"),
+            ))
+    return records
+
+
+def format_record(record):
+    # One compact line per outbreak; this is all the LLM sees for a state.
+    start = record.start_date.isoformat() if record.start_date else "unknown"
+    line = f"{record.disease} | {record.district or 'district unknown'} | cases {record.cases} | deaths {record.deaths} | since {start}"
+    return f"{line} | {record.status}" if record.status else line
@@ -0,0 +1,312 @@
+# Nearby Services lookup: an offline PIN-code geocoder and a grid-indexed hospital/clinic store,
+# queried with vectorised haversine distances. Nominatim and Overpass are only used as a fallback
+# when a PIN code or area is not covered by the local data.
+#
+#   python -m modules.nearby build --pincodes all_india_pincode.csv --facilities hospitals.json
+
+import os
+import csv
+import sys
+import json
+import argparse
+import threading
+import numpy as np
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules.observability import get_logger, span
+
+logger = get_logger("nearby")
+
+NEARBY_DATA_DIR = os.getenv("MAYA_NEARBY_DATA_DIR", "data/nearby")
+PINCODES_FILE = "pincodes.npz"
+FACILITIES_FILE = "facilities.npz"
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+GRID_CELL_DEG = 0.05
+SEARCH_RADIUS_KM = 5.0
+NEAREST_K = 5
+FACILITY_AMENITIES = ("hospital", "clinic")
+
+
+def haversine(lat1, lon1, lats, lons):
+    # Distance in km from one point to arrays of points, all in degrees.
+    lat1, lon1, lats, lons = map(np.radians, (lat1, lon1, lats, lons))
+    a = np.sin((lats - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+# ---------------- PIN-Code Geocoder ---------------- #
+class PincodeTable:
+
+    def __init__(self, pincodes, lats, lons):
+        self._centroids = {int(p): (float(la), float(lo)) for p, la, lo in zip(pincodes, lats, lons)}
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["pincode"], data["lat"], data["lon"])
+
+    def lookup(self, pincode):
+        try:
+            return self._centroids.get(int(str(pincode).strip()))
+        except ValueError:
+            return None
+
+
+def _pick_column(header, *names):
+    lowered = [h.strip().lower() for h in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    raise ValueError(f"None of the columns {names} found in {header}")
+
+
+def build_pincode_table(csv_path, out_path):
+    # Accepts the India Post pincode directory or any CSV with pincode/latitude/longitude columns;
+    # post offices sharing a PIN code are averaged into one centroid.
+    sums = {}
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        pin_col = _pick_column(header, "pincode", "pin", "pin_code")
+        lat_col = _pick_column(header, "latitude", "lat")
+        lon_col = _pick_column(header, "longitude", "lon", "lng")
+        for row in reader:
+            try:
+                pincode, lat, lon = int(row[pin_col]), float(row[lat_col]), float(row[lon_col])
+            except (ValueError, IndexError):
+                continue
+            if not (6 <= lat <= 38 and 68 <= lon <= 98):
+                continue  # outside India, usually a data-entry error
+            total = sums.setdefault(pincode, [0.0, 0.0, 0])
+            total[0] += lat
+            total[1] += lon
+            total[2] += 1
+
+    pincodes = np.array(sorted(sums), dtype=np.int32)
+    lats = np.array([sums[p][0] / sums[p][2] for p in pincodes], dtype=np.float64)
+    lons = np.array([sums[p][1] / sums[p][2] for p in pincodes], dtype=np.float64)
+    np.savez_compressed(out_path, pincode=pincodes, lat=lats, lon=lons)
+    logger.info(f"Saved {len(pincodes)} PIN-code centroids to {out_path}")
+
+
+# ---------------- Facility Store ---------------- #
+class FacilityIndex:
+    # Facilities are sorted by grid cell so each cell is a contiguous slice; a k-nearest query
+    # scans rings of cells outwards and stops once no unscanned cell can hold a closer point.
+
+    def __init__(self, names, types, lats, lons, cell_deg=GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        rows = np.floor(lats / cell_deg).astype(np.int64)
+        cols = np.floor(lons / cell_deg).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.names, self.types = names[order], types[order]
+        self.lats, self.lons = lats[order], lons[order]
+        rows, cols = rows[order], cols[order]
+
+        self._cells = {}
+        if len(order):
+            boundaries = np.flatnonzero((np.diff(rows) != 0) | (np.diff(cols) != 0)) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(order)]))
+            for start, end in zip(starts, ends):
+                self._cells[(int(rows[start]), int(cols[start]))] = (int(start), int(end))
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["name"], data["type"], data["lat"], data["lon"])
+
+    def save(self, path):
+        np.savez_compressed(path, name=self.names, type=self.types, lat=self.lats, lon=self.lons)
+
+    def _ring(self, row, col, r):
+        if r == 0:
+            yield row, col
+            return
+        for c in range(col - r, col + r + 1):
+            yield row - r, c
+            yield row + r, c
+        for rr in range(row - r + 1, row + r):
+            yield rr, col - r
+            yield rr, col + r
+
+    def nearest(self, lat, lon, k=NEAREST_K, max_km=SEARCH_RADIUS_KM):
+        row, col = int(np.floor(lat / self.cell_deg)), int(np.floor(lon / self.cell_deg))
+        # Smallest ground distance covered by one cell, so ring r guarantees everything within r cells.
+        cell_km = self.cell_deg * KM_PER_DEGREE * min(1.0, np.cos(np.radians(abs(lat) + self.cell_deg)))
+
+        slices = []
+        r = 0
+        while True:
+            slices.extend(self._cells[c] for c in self._ring(row, col, r) if c in self._cells)
+            covered_km = r * cell_km
+            if covered_km >= max_km:
+                break
+            if sum(end - start for start, end in slices) >= k:
+                idx = np.concatenate([np.arange(start, end) for start, end in slices])
+                dist = haversine(lat, lon, self.lats[idx], self.lons[idx])
+                if np.partition(dist, k - 1)[k - 1] <= covered_km:
+                    break
+            r += 1
+
+        if not slices:
+            return []
+        idx = np.concatenate([np.arange(start, end) for start, end in slices])
+        dist = haversine(lat, lon, self.lats[idx], self.lons[idx])
+        within = np.flatnonzero(dist <= max_km)
+        best = within[np.argsort(dist[within])[:k]]
+        return [{
+            "name": str(self.names[idx[i]]),
+            "lat": float(self.lats[idx[i]]),
+            "lon": float(self.lons[idx[i]]),
+            "type": str(self.types[idx[i]]),
+            "distance": float(dist[i])
+        } for i in best]
+
+
+def _facilities_from_elements(elements):
+    # Overpass-style JSON elements (nodes carry lat/lon, ways and relations a "center").
+    names, types, lats, lons = [], [], [], []
+    for el in elements:
+        tags = el.get("tags", {})
+        if tags.get("amenity") not in FACILITY_AMENITIES:
+            continue
+        lat_h = el.get("lat") or el.get("center", {}).get("lat")
+        lon_h = el.get("lon") or el.get("center", {}).get("lon")
+        if lat_h and lon_h:
+            names.append(tags.get("name", "Unknown"))
+            types.append(tags.get("amenity", "N/A"))
+            lats.append(float(lat_h))
+            lons.append(float(lon_h))
+    return names, types, lats, lons
+
+
+def build_facility_index(source_path, out_path):
+    # Bulk import from an OSM extract exported as Overpass JSON, or a CSV with name,type,lat,lon.
+    if source_path.endswith(".json"):
+        with open(source_path, encoding="utf-8") as f:
+            names, types, lats, lons = _facilities_from_elements(json.load(f).get("elements", []))
+    else:
+        names, types, lats, lons = [], [], [], []
+        with open(source_path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                try:
+                    lats.append(float(row["lat"]))
+                    lons.append(float(row["lon"]))
+                except (KeyError, ValueError):
+                    continue
+                names.append(row.get("name") or "Unknown")
+                types.append(row.get("type") or "N/A")
+
+    index = FacilityIndex(np.array(names, dtype=str), np.array(types, dtype=str),
+                          np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64))
+    index.save(out_path)
+    logger.info(f"Saved {len(index)} facilities to {out_path}")
+
+
+# ---------------- Live API Fallback ---------------- #
+GEOCODE_TTL = 30 * 24 * 3600
+OVERPASS_TTL = 24 * 3600
+
+
+def geocode_live(pincode):
+    from modules.http_client import get_client
+
+    geo_url = "https://nominatim.openstreetmap.org/search"
+    geo_res = get_client().get(geo_url, params={"q": f"{pincode}, India", "format": "json"}, ttl=GEOCODE_TTL)
+    try:
+        geo_res_json = geo_res.json()
+    except Exception:
+        geo_res_json = []
+    if not geo_res_json:
+        return None
+    return float(geo_res_json[0]["lat"]), float(geo_res_json[0]["lon"])
+
+
+def nearest_live(lat, lon, k=NEAREST_K, max_km=SEARCH_RADIUS_KM):
+    from modules.http_client import get_client
+
+    radius_m = int(max_km * 1000)
+    query = f"""
+        [out:json];
+        (node["amenity"~"hospital|clinic"](around:{radius_m},{lat},{lon});
+         way["amenity"~"hospital|clinic"](around:{radius_m},{lat},{lon});
+         relation["amenity"~"hospital|clinic"](around:{radius_m},{lat},{lon});
+        );
+        out center;
+    """
+    overpass_url = "https://overpass-api.de/api/interpreter"
+    response = get_client().post(overpass_url, data=query, ttl=OVERPASS_TTL)
+    try:
+        data = response.json()
+    except Exception:
+        raise RuntimeError("Overpass API returned invalid response.")
+
+    names, types, lats, lons = _facilities_from_elements(data.get("elements", []))
+    if not names:
+        return []
+    dist = haversine(lat, lon, np.array(lats), np.array(lons))
+    best = np.argsort(dist)[:k]
+    return [{"name": names[i], "lat": lats[i], "lon": lons[i], "type": types[i], "distance": float(dist[i])}
+            for i in best]
+
+
+# ---------------- Lookup ---------------- #
+_local_data = {}
+_local_lock = threading.Lock()
+
+
+def _local(name, loader):
+    # Local tables are loaded once per process; a missing file is remembered as None.
+    if name not in _local_data:
+        with _local_lock:
+            if name not in _local_data:
+                path = os.path.join(NEARBY_DATA_DIR, name)
+                _local_data[name] = loader(path) if os.path.exists(path) else None
+    return _local_data[name]
+
+
+def find_nearby(pincode, k=NEAREST_K, max_km=SEARCH_RADIUS_KM):
+    # Returns (lat, lon, facilities), or None if the PIN code cannot be located.
+    with span("nearby_geocode") as s:
+        pincodes = _local(PINCODES_FILE, PincodeTable.load)
+        location = pincodes.lookup(pincode) if pincodes is not None else None
+        s.set(local_hit=location is not None)
+        if location is None:
+            location = geocode_live(pincode)
+    if location is None:
+        return None
+
+    lat, lon = location
+    with span("nearby_search") as s:
+        facilities = _local(FACILITIES_FILE, FacilityIndex.load)
+        hospitals = facilities.nearest(lat, lon, k=k, max_km=max_km) if facilities is not None else []
+        s.set(local_hit=bool(hospitals))
+        if not hospitals:
+            hospitals = nearest_live(lat, lon, k=k, max_km=max_km)
+        s.set(results=len(hospitals))
+    return lat, lon, hospitals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline Nearby Services data files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="import PIN-code centroids and/or facilities")
+    build.add_argument("--pincodes", help="CSV with pincode, latitude and longitude columns")
+    build.add_argument("--facilities", help="Overpass JSON export or CSV (name,type,lat,lon) of hospitals/clinics")
+    build.add_argument("--out-dir", default=NEARBY_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.pincodes:
+        build_pincode_table(args.pincodes, os.path.join(args.out_dir, PINCODES_FILE))
+    if args.facilities:
+        build_facility_index(args.facilities, os.path.join(args.out_dir, FACILITIES_FILE))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
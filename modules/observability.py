@@ -0,0 +1,216 @@
+# Logging and low-overhead tracing for the request path.
+#
+# Logging: every module logs through get_logger(); MAYA_LOG_LEVEL (default INFO) controls verbosity,
+# so the prompt/history dumps only appear with MAYA_LOG_LEVEL=DEBUG.
+#
+# Tracing: `with span("retrieval") as s: ...; s.set(docs=4)` records the duration in a histogram and
+# numeric attributes in counters. Metrics are exported in Prometheus text format (render_prometheus,
+# or an HTTP endpoint on MAYA_METRICS_PORT) and, if MAYA_TRACE_FILE is set, each span is appended to
+# that file as one JSON line.
+#
+# The MAYA_* variables are read when first needed rather than at import, so values from a .env file
+# loaded by the entry point after this module was imported still apply.
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+
+def get_logger(name):
+    global _logging_configured
+    if not _logging_configured:
+        with _logging_lock:
+            if not _logging_configured:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+                root = logging.getLogger("maya")
+                root.addHandler(handler)
+                root.setLevel(os.getenv("MAYA_LOG_LEVEL", "INFO").upper())
+                root.propagate = False
+                _logging_configured = True
+    return logging.getLogger(f"maya.{name}")
+
+
+# ---------------- Metrics Registry ---------------- #
+class Histogram:
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+
+_counters = {}
+_histograms = {}
+_metrics_lock = threading.Lock()
+_trace_lock = threading.Lock()
+_trace_handle = None
+_UNSET = object()
+_trace_path = _UNSET
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = (name, _labels_key(labels))
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, amount, **labels):
+    key = (name, _labels_key(labels))
+    with _metrics_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(amount)
+
+
+def _trace_file():
+    # MAYA_TRACE_FILE, resolved on the first span and then fixed for the process.
+    global _trace_path
+    if _trace_path is _UNSET:
+        _trace_path = os.getenv("MAYA_TRACE_FILE") or None
+    return _trace_path
+
+
+def _write_trace(record):
+    global _trace_handle
+    with _trace_lock:
+        if _trace_handle is None:
+            _trace_handle = open(_trace_file(), "a", encoding="utf-8", buffering=1)
+        _trace_handle.write(json.dumps(record) + "\n")
+
+
+class Span:
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    current = Span(name, attrs)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe("maya_span_duration_seconds", duration, span=name)
+        if error is not None:
+            inc("maya_span_errors_total", span=name, error=error)
+        for key, value in current.attrs.items():
+            if isinstance(value, bool):
+                inc(f"maya_{key}_total", span=name, value=str(value).lower())
+            elif isinstance(value, (int, float)):
+                inc(f"maya_{key}_total", value, span=name)
+        if _trace_file():
+            _write_trace({"span": name, "ts": time.time(), "duration_ms": duration * 1000.0,
+                          "error": error, **current.attrs})
+
+
+# ---------------- Export ---------------- #
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def render_prometheus():
+    with _metrics_lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items(), key=lambda item: item[0])
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    # JSON-friendly view of all metrics, e.g. for benchmarks or a debug endpoint.
+    with _metrics_lock:
+        return {
+            "counters": {f"{name}{_format_labels(labels)}": value for (name, labels), value in _counters.items()},
+            "histograms": {
+                f"{name}{_format_labels(labels)}": {"count": h.count, "sum": h.total}
+                for (name, labels), h in _histograms.items()
+            },
+        }
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port=None):
+    # Serves /metrics from a daemon thread; a no-op unless a port is given or MAYA_METRICS_PORT is set.
+    global _metrics_server
+    port = port or os.getenv("MAYA_METRICS_PORT")
+    if not port or _metrics_server is not None:
+        return _metrics_server
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _metrics_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = ThreadingHTTPServer(("0.0.0.0", int(port)), MetricsHandler)
+            except OSError as e:
+                get_logger("observability").warning(f"Metrics server not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True, name="maya-metrics").start()
+    return _metrics_server
@@ -0,0 +1,212 @@
+# Columnar outbreak dataset built from the parsed IDSP tables, accumulated week after week.
+# Records are kept as NumPy column arrays in one compressed .npz file. Strings are dictionary-encoded:
+# each string column is an int32 code array plus a vocabulary array. Filtering, aggregation and weekly
+# trends are vectorised array operations.
+#
+#   python -m modules.outbreak_store Kerala          # weekly cases/deaths and top diseases for a state
+
+import os
+import sys
+import argparse
+import threading
+import numpy as np
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules.alert_store import ALERT_STORE_DIR
+from modules.observability import get_logger
+
+logger = get_logger("outbreak_store")
+
+OUTBREAKS_FILE = os.path.join(ALERT_STORE_DIR, "outbreaks.npz")
+
+STRING_COLUMNS = ("report_hash", "outbreak_id", "state", "district", "disease", "status")
+INT_COLUMNS = ("cases", "deaths")
+DATE_COLUMNS = ("start_date", "report_date", "week")
+
+
+def _empty_columns():
+    columns = {name: np.zeros(0, dtype=np.int32) for name in STRING_COLUMNS + INT_COLUMNS}
+    columns.update({name: np.zeros(0, dtype="datetime64[D]") for name in DATE_COLUMNS})
+    return columns
+
+
+def _week_start(dates):
+    # Monday of the ISO week; 1970-01-01 was a Thursday, hence the 3-day shift. Undated rows stay NaT.
+    dates = dates.astype("datetime64[D]")
+    days = dates.astype(np.int64)
+    weeks = (days - (days + 3) % 7).astype("datetime64[D]")
+    weeks[np.isnat(dates)] = np.datetime64("NaT")
+    return weeks
+
+
+class OutbreakDataset:
+
+    def __init__(self, path=OUTBREAKS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.columns = _empty_columns()
+        self.vocab = {name: np.zeros(0, dtype=str) for name in STRING_COLUMNS}
+
+    def _load(self):
+        # Reloads when another process (the ingestion job) has replaced the file.
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with np.load(self.path, allow_pickle=False) as data:
+            self.columns = {name: data[name] for name in STRING_COLUMNS + INT_COLUMNS + DATE_COLUMNS}
+            self.vocab = {name: data[f"vocab_{name}"] for name in STRING_COLUMNS}
+        self._mtime = mtime
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self.columns["cases"])
+
+    def has_report(self, report_hash):
+        with self._lock:
+            self._load()
+            return report_hash in set(self.vocab["report_hash"].tolist())
+
+    # ---------------- Writing ---------------- #
+    def _encode(self, name, values):
+        vocab = self.vocab[name].tolist()
+        index = {value: i for i, value in enumerate(vocab)}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(vocab)
+                vocab.append(value)
+            codes[i] = code
+        self.vocab[name] = np.array(vocab, dtype=str)
+        return codes
+
+    def append(self, report_hash, records, report_date=None):
+        # Adds one report's records; a report already in the dataset is skipped. A row's week comes from its
+        # own reporting date, then the report's date, then its start date; rows with none are kept undated
+        # and left out of the weekly trends.
+        with self._lock:
+            self._load()
+            if report_hash in set(self.vocab["report_hash"].tolist()):
+                return 0
+            if not records:
+                return 0
+
+            report_dates = np.array([r.report_date or report_date or r.start_date or "NaT" for r in records],
+                                    dtype="datetime64[D]")
+            new = {
+                "report_hash": self._encode("report_hash", [report_hash] * len(records)),
+                "cases": np.array([r.cases for r in records], dtype=np.int32),
+                "deaths": np.array([r.deaths for r in records], dtype=np.int32),
+                "start_date": np.array([r.start_date or "NaT" for r in records], dtype="datetime64[D]"),
+                "report_date": report_dates,
+                "week": _week_start(report_dates),
+            }
+            for name in STRING_COLUMNS[1:]:
+                new[name] = self._encode(name, [getattr(r, name) for r in records])
+
+            self.columns = {name: np.concatenate([self.columns[name], new[name]]) for name in self.columns}
+            self._save()
+            return len(records)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        arrays = dict(self.columns)
+        arrays.update({f"vocab_{name}": vocab for name, vocab in self.vocab.items()})
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    # ---------------- Queries ---------------- #
+    def _mask(self, state=None, disease=None, report_hash=None, since=None):
+        mask = np.ones(len(self.columns["cases"]), dtype=bool)
+        for name, value in (("state", state), ("disease", disease), ("report_hash", report_hash)):
+            if value is not None:
+                hits = np.flatnonzero(self.vocab[name] == value)
+                mask &= self.columns[name] == (hits[0] if len(hits) else -1)
+        if since is not None:
+            mask &= self.columns["week"] >= np.datetime64(since, "D")
+        return mask
+
+    def records(self, **filters):
+        with self._lock:
+            self._load()
+            idx = np.flatnonzero(self._mask(**filters))
+            rows = []
+            for i in idx:
+                row = {name: str(self.vocab[name][self.columns[name][i]]) for name in STRING_COLUMNS}
+                row.update({name: int(self.columns[name][i]) for name in INT_COLUMNS})
+                row.update({
+                    name: None if np.isnat(self.columns[name][i]) else str(self.columns[name][i])
+                    for name in DATE_COLUMNS
+                })
+                rows.append(row)
+            return rows
+
+    def weekly_totals(self, state=None, disease=None, since=None):
+        # {"weeks": [...], "cases": [...], "deaths": [...]} summed per ISO week, oldest first.
+        with self._lock:
+            self._load()
+            mask = self._mask(state=state, disease=disease, since=since) & ~np.isnat(self.columns["week"])
+            weeks, inverse = np.unique(self.columns["week"][mask], return_inverse=True)
+            cases = np.bincount(inverse, weights=self.columns["cases"][mask], minlength=len(weeks))
+            deaths = np.bincount(inverse, weights=self.columns["deaths"][mask], minlength=len(weeks))
+        return {
+            "weeks": [str(w) for w in weeks],
+            "cases": cases.astype(int).tolist(),
+            "deaths": deaths.astype(int).tolist(),
+        }
+
+    def top_diseases(self, state=None, since=None, n=5):
+        # [(disease, outbreaks, cases, deaths)] ordered by cases.
+        with self._lock:
+            self._load()
+            mask = self._mask(state=state, since=since)
+            codes = self.columns["disease"][mask]
+            size = len(self.vocab["disease"])
+            outbreaks = np.bincount(codes, minlength=size)
+            cases = np.bincount(codes, weights=self.columns["cases"][mask], minlength=size)
+            deaths = np.bincount(codes, weights=self.columns["deaths"][mask], minlength=size)
+            order = np.argsort(-cases, kind="stable")[:n]
+            return [
+                (str(self.vocab["disease"][i]), int(outbreaks[i]), int(cases[i]), int(deaths[i]))
+                for i in order if outbreaks[i]
+            ]
+
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+
+def get_dataset():
+    global _dataset
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                _dataset = OutbreakDataset()
+    return _dataset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the accumulated IDSP outbreak dataset.")
+    parser.add_argument("state", nargs="?", help="limit to one state")
+    parser.add_argument("--disease")
+    parser.add_argument("--since", help="first week to include, YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    dataset = get_dataset()
+    print(f"{len(dataset)} outbreak records in {dataset.path}")
+    totals = dataset.weekly_totals(state=args.state, disease=args.disease, since=args.since)
+    for week, cases, deaths in zip(totals["weeks"], totals["cases"], totals["deaths"]):
+        print(f"{week}  cases {cases:>6}  deaths {deaths:>4}")
+    for disease, outbreaks, cases, deaths in dataset.top_diseases(state=args.state, since=args.since):
+        print(f"{disease:<30} outbreaks {outbreaks:>3}  cases {cases:>6}  deaths {deaths:>4}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# Process-wide registry of heavy resources (embedding model, section indexes, LLM clients, RAG chains).
+# Streamlit re-executes app.py for every session and rerun, but imported modules live for the whole
+# process, so everything held here is built once and shared by all sessions.
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules.observability import get_logger, inc, observe
+
+logger = get_logger("resources")
+
+SECTION_FILES = {
+    "remedies": [
+        "documents/remedies/8.1.4-Details-of-Promotional-measures-undertaken-for-each-activity.pdf",
+        "documents/remedies/Ayurvedic-Home-Remedies-English.pdf",
+        "documents/remedies/Food_Recipes_From_AYUSH.pdf"
+    ],
+    "schemes": [
+        "documents/schemes/6851513623Nutrition-support-DBT-Scheme-details.pdf",
+        "documents/schemes/97827133331523438951.pdf",
+        "documents/schemes/Ayushman Bharat Scheme.pdf",
+        "documents/schemes/general_schemes.json"
+    ],
+    "emergency": ["documents/FA-manual-1.pdf"],
+}
+
+LLM_POOL_SIZE = int(os.getenv("MAYA_LLM_POOL_SIZE", "4"))
+USE_RERANKER = os.getenv("MAYA_RERANKER", "0") == "1"
+USE_HISTORY_SUMMARY = os.getenv("MAYA_HISTORY_SUMMARY", "0") == "1"
+USE_COALESCING = os.getenv("MAYA_COALESCE", "1") == "1"
+MAX_CONCURRENT_LLM = int(os.getenv("MAYA_MAX_CONCURRENT_LLM", "8"))
+LLM_QUEUE_SIZE = int(os.getenv("MAYA_LLM_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("MAYA_LLM_QUEUE_TIMEOUT", "15"))
+
+_resources = {}
+_registry_lock = threading.Lock()
+_key_locks = defaultdict(threading.Lock)
+_warm_up_thread = None
+_process_started = False
+
+
+def _get_or_create(key, factory):
+    # Double-checked, per-key locking: two sessions asking for the same section wait for a
+    # single build, while different sections can load in parallel.
+    if key in _resources:
+        return _resources[key]
+    with _registry_lock:
+        key_lock = _key_locks[key]
+    with key_lock:
+        if key not in _resources:
+            _resources[key] = factory()
+    return _resources[key]
+
+
+class ServiceBusy(RuntimeError):
+    pass
+
+
+class ConcurrencyGate:
+    # At most `limit` holders at a time and at most `queue_size` waiters. Callers beyond that, or waiting
+    # longer than `timeout`, get ServiceBusy straight away instead of piling up behind the LLM.
+
+    def __init__(self, limit=MAX_CONCURRENT_LLM, queue_size=LLM_QUEUE_SIZE, timeout=LLM_QUEUE_TIMEOUT):
+        self.limit = max(1, limit)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        start = time.monotonic()
+        with self._cond:
+            if self.active >= self.limit:
+                if self.waiting >= self.queue_size:
+                    inc("maya_llm_rejected_total", reason="queue_full")
+                    raise ServiceBusy("Too many questions in flight, please retry shortly.")
+                self.waiting += 1
+                try:
+                    deadline = start + self.timeout
+                    while self.active >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            inc("maya_llm_rejected_total", reason="timeout")
+                            raise ServiceBusy("Timed out waiting for a free LLM slot, please retry shortly.")
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+        observe("maya_llm_queue_wait_seconds", time.monotonic() - start)
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {"active": self.active, "waiting": self.waiting, "limit": self.limit, "queue_size": self.queue_size}
+
+
+class LLMPool:
+    # Small round-robin pool of LLM clients; exposes the same invoke/stream calls as a single client.
+    # Every call holds a slot of `gate`, so cache hits and coalesced requests never count against it.
+
+    def __init__(self, factory, size=LLM_POOL_SIZE, gate=None):
+        self._factory = factory
+        self._size = max(1, size)
+        self._gate = gate
+        self._clients = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _client(self):
+        with self._lock:
+            if len(self._clients) < self._size:
+                self._clients.append(self._factory())
+                return self._clients[-1]
+            client = self._clients[self._next % self._size]
+            self._next += 1
+            return client
+
+    def invoke(self, *args, **kwargs):
+        if self._gate is None:
+            return self._client().invoke(*args, **kwargs)
+        with self._gate.slot():
+            return self._client().invoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        if self._gate is None:
+            yield from self._client().stream(*args, **kwargs)
+            return
+        with self._gate.slot():
+            yield from self._client().stream(*args, **kwargs)
+
+
+# ---------------- Accessors ---------------- #
+def get_embeddings():
+    from modules.embeddings import LazyEmbeddings
+    return _get_or_create("embeddings", LazyEmbeddings)
+
+
+def get_llm_gate():
+    return _get_or_create("llm_gate", ConcurrencyGate)
+
+
+def get_llm():
+    from rag_pipeline.rag_pipeline import create_llm
+    return _get_or_create("llm_pool", lambda: LLMPool(create_llm, gate=get_llm_gate()))
+
+
+def get_single_flight():
+    from rag_pipeline.coalescing import SingleFlight
+    return _get_or_create("single_flight", lambda: SingleFlight("rag_answer") if USE_COALESCING else None)
+
+
+def get_vector_db(section):
+    from modules.vector_store import get_vector_db as open_section_index
+    return _get_or_create(
+        f"vector_db:{section}",
+        lambda: open_section_index(section=section, file_paths=SECTION_FILES[section], embeddings=get_embeddings())
+    )
+
+
+def get_response_cache(section):
+    from rag_pipeline.cache import SemanticCache
+    return _get_or_create(f"response_cache:{section}", lambda: SemanticCache(get_embeddings().embed_query))
+
+
+def get_history_summarizer():
+    from rag_pipeline.memory import make_llm_summarizer
+    return _get_or_create("history_summarizer", lambda: make_llm_summarizer(get_llm()) if USE_HISTORY_SUMMARY else None)
+
+
+def get_reranker():
+    from rag_pipeline.retrieval import load_reranker
+    return _get_or_create("reranker", lambda: load_reranker() if USE_RERANKER else None)
+
+
+def get_session_store():
+    from rag_pipeline.memory import ConversationMemory, SessionMemoryStore
+    return _get_or_create(
+        "session_store",
+        lambda: SessionMemoryStore(factory=lambda: ConversationMemory(summarizer=get_history_summarizer()))
+    )
+
+
+def get_scheme_catalogue():
+    from modules.scheme_catalogue import SchemeCatalogue, SCHEMES_FILE
+    return _get_or_create("scheme_catalogue", lambda: SchemeCatalogue.from_json(SCHEMES_FILE))
+
+
+def get_context_preamble(section):
+    # Whole-document prefix for sections configured for context caching (MAYA_CONTEXT_CACHE), else None.
+    def build():
+        from rag_pipeline.context_cache import (CONTEXT_CACHE_MODE, CONTEXT_CACHE_MODEL, CONTEXT_CACHE_SECTIONS,
+                                                create_preamble)
+        if CONTEXT_CACHE_MODE == "off" or section not in CONTEXT_CACHE_SECTIONS:
+            return None
+        from modules.document_loader import load_files
+        from rag_pipeline.prompts import build_system_prompt
+        from rag_pipeline.rag_pipeline import create_llm
+
+        document_text = "\n\n".join(doc.page_content for doc in load_files(SECTION_FILES[section]))
+        return create_preamble(
+            section, build_system_prompt(section), document_text,
+            llm_factory=lambda name: LLMPool(lambda: create_llm(model=CONTEXT_CACHE_MODEL, cached_content=name),
+                                             gate=get_llm_gate())
+        )
+    return _get_or_create(f"context_preamble:{section}", build)
+
+
+def get_rag_chain(section):
+    from rag_pipeline.rag_pipeline import build_rag_chain
+    return _get_or_create(
+        f"rag_chain:{section}",
+        lambda: build_rag_chain(get_vector_db(section), context_type=section, llm=get_llm(),
+                                cache=get_response_cache(section), reranker=get_reranker(),
+                                flights=get_single_flight(),
+                                catalogue=get_scheme_catalogue() if section == "schemes" else None,
+                                preamble=get_context_preamble(section))
+    )
+
+
+def is_loaded(key):
+    return key in _resources
+
+
+# ---------------- Warm-up ---------------- #
+def warm_up(sections=None):
+    # Builds every shared resource up front, including the embedding model itself,
+    # so the first user request does not pay for loading.
+    sections = sections or list(SECTION_FILES)
+    get_embeddings()._get_model()
+    get_llm()
+    for section in sections:
+        get_rag_chain(section)
+    logger.info(f"Resource registry warmed up for: {', '.join(sections)}")
+
+
+def _warm_up_in_background(sections):
+    try:
+        warm_up(sections)
+    except Exception as e:
+        logger.warning(f"Background warm-up failed: {e}")
+
+
+def start_warm_up(sections=None):
+    global _warm_up_thread
+    with _registry_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up_in_background, args=(sections,), daemon=True, name="maya-warm-up")
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def _warm_up_sections(spec):
+    if spec.strip().lower() == "all":
+        return list(SECTION_FILES)
+    return [s.strip() for s in spec.split(",") if s.strip() in SECTION_FILES]
+
+
+def init_process(warm_up_sections=None):
+    # Once per process: metrics endpoint and the optional background warm-up. MAYA_WARM_UP is "all",
+    # a comma-separated list of sections, or empty to load each section (and its heavy imports) only
+    # when it is first opened. Streamlit calls this on every rerun; after the first call it is a flag check.
+    # The entry point loads .env before importing project modules, which read MAYA_* settings at import.
+    global _process_started
+    if _process_started:
+        return
+    with _registry_lock:
+        if _process_started:
+            return
+        _process_started = True
+
+    from modules.observability import start_metrics_server
+
+    start_metrics_server()
+    if warm_up_sections is None:
+        warm_up_sections = _warm_up_sections(os.getenv("MAYA_WARM_UP", ""))
+    sections = warm_up_sections
+    if sections:
+        start_warm_up(sections)
+
+
+def prebuild(sections=None):
+    # Offline preparation for a deployment: downloads/loads the embedding model and builds or updates the
+    # on-disk index of every section. The in-memory registry of this process is discarded on exit; serving
+    # processes warm up through MAYA_WARM_UP (Streamlit) or the API lifespan.
+    sections = sections or list(SECTION_FILES)
+    get_embeddings()._get_model()
+    for section in sections:
+        get_vector_db(section)
+    logger.info(f"On-disk indexes are up to date for: {', '.join(sections)}")
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Download the embedding model and prebuild the section indexes.")
+    parser.add_argument("sections", nargs="*", help=f"any of {', '.join(SECTION_FILES)}; default all")
+    args = parser.parse_args()
+    unknown = [s for s in args.sections if s not in SECTION_FILES]
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(unknown)}")
+    prebuild(args.sections)
+    sys.exit(0)
@@ -0,0 +1,266 @@
+# Structured catalogue of the government schemes in documents/schemes/general_schemes.json.
+# The JSON is loaded once into typed Scheme records. Inverted indexes cover name tokens, state,
+# beneficiary category and benefit type, and a trigram index over name tokens tolerates misspelt or
+# partial names. The Schemes chain asks the catalogue first: a direct lookup takes microseconds. Matching
+# records (and only the fields asked about) are added to the retrieved context; a confident match on one
+# named scheme for a field the record fully answers skips retrieval.
+#
+#   python -m modules.scheme_catalogue "pregnant women in Rajasthan"
+
+import re
+import sys
+import json
+import math
+import argparse
+from collections import namedtuple, defaultdict
+import modules.env  # noqa: F401  (loads .env before any MAYA_* setting is read)
+from modules.states import ALL_STATES, STATE_ALIASES
+from modules.observability import get_logger
+
+logger = get_logger("scheme_catalogue")
+
+SCHEMES_FILE = "documents/schemes/general_schemes.json"
+NATIONAL = "National"
+MAX_RESULTS = 5
+FUZZY_MIN_DICE = 0.7
+
+FIELDS = (
+    "scheme_name", "category", "applicable_state", "target_audience", "launched_by", "objective",
+    "eligibility", "benefits", "documents_required", "how_to_apply", "application_link", "official_pdf",
+    "helpline",
+)
+Scheme = namedtuple("Scheme", ("id",) + FIELDS)
+SchemeMatch = namedtuple("SchemeMatch", ["schemes", "fields", "reason", "confident"])
+
+# Words too common in scheme names to identify one.
+GENERIC_NAME_TOKENS = frozenset("""
+scheme schemes yojana yojna abhiyan mission programme program pradhan mantri mukhyamantri national
+health the of for and
+""".split())
+
+BENEFICIARY_KEYWORDS = {
+    "women": ("women", "woman", "mother", "mothers", "maternal", "lactating", "mahila", "aurat"),
+    "pregnant": ("pregnant", "pregnancy", "childbirth", "institutional delivery", "garbhvati"),
+    "children": ("child", "children", "girl child", "infant", "newborn", "bachcha", "bacche"),
+    "elderly": ("elderly", "senior citizen", "senior citizens", "old age", "budhe"),
+    "poor": ("poor", "bpl", "low income", "vulnerable", "deprivation", "nfsa", "secc", "garib"),
+    "patients": ("patient", "patients", "tb", "tuberculosis"),
+    "farmers": ("farmer", "farmers", "kisan"),
+    "workers": ("labour", "labor", "labourer", "worker", "workers", "wage"),
+    "disabled": ("disability", "disabled", "divyang"),
+}
+
+BENEFIT_KEYWORDS = {
+    "insurance": ("insurance", "cover", "cashless", "premium", "beema", "bima"),
+    "hospitalisation": ("hospital", "hospitals", "hospitalization", "hospitalisation", "aspatal"),
+    "cash": ("cash", "dbt", "instalment", "instalments", "installment", "installments", "incentive", "assistance",
+             "per month", "paisa", "money"),
+    "nutrition": ("nutrition", "nutritional", "poshan", "food", "diet"),
+}
+
+# Question words that ask for specific fields; the LLM then only sees those fields.
+FIELD_KEYWORDS = {
+    "eligibility": ("eligible", "eligibility", "who can", "qualify", "patrata"),
+    "benefits": ("benefit", "benefits", "amount", "how much", "labh", "milega"),
+    "documents_required": ("document", "documents", "papers", "aadhaar", "kagaz"),
+    "how_to_apply": ("apply", "application", "register", "registration", "enrol", "kaise"),
+    "application_link": ("link", "website", "portal", "online"),
+    "helpline": ("helpline", "contact", "phone", "number", "call"),
+}
+CORE_FIELDS = ("scheme_name", "applicable_state")
+# Fields the JSON record answers completely. Eligibility, benefits and the application process are
+# described in more detail in the scheme PDFs, so questions about them still go through retrieval.
+RECORD_ONLY_FIELDS = frozenset(("application_link", "helpline", "documents_required"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_ACRONYM_RE = re.compile(r"\(([A-Z][A-Z-]{1,})\)")
+
+
+def _keyword_pattern(keywords):
+    return re.compile(r"(?<!\w)(?:" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")(?!\w)")
+
+
+_BENEFICIARY_PATTERNS = {name: _keyword_pattern(words) for name, words in BENEFICIARY_KEYWORDS.items()}
+_BENEFIT_PATTERNS = {name: _keyword_pattern(words) for name, words in BENEFIT_KEYWORDS.items()}
+_FIELD_PATTERNS = {name: _keyword_pattern(words) for name, words in FIELD_KEYWORDS.items()}
+_STATE_NAMES = {state.lower(): state for state in ALL_STATES}
+_STATE_NAMES.update(STATE_ALIASES)
+_STATE_PATTERN = _keyword_pattern(_STATE_NAMES)
+
+
+def name_tokens(text):
+    # Hyphenated names are indexed both joined and split: "PM-JAY" -> pmjay, pm, jay.
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = token.split("-")
+        tokens.append("".join(parts))
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _tags(patterns, text):
+    return {name for name, pattern in patterns.items() if pattern.search(text)}
+
+
+class SchemeCatalogue:
+
+    def __init__(self, schemes):
+        self.schemes = schemes
+        self.by_state = defaultdict(set)
+        self.by_beneficiary = defaultdict(set)
+        self.by_benefit = defaultdict(set)
+        self.by_name_token = defaultdict(set)
+        self.token_trigrams = defaultdict(set)   # trigram -> name tokens containing it
+
+        for scheme in schemes:
+            self.by_state[scheme.applicable_state].add(scheme.id)
+            profile = " ".join([scheme.target_audience, scheme.eligibility, scheme.objective, scheme.benefits]).lower()
+            for tag in _tags(_BENEFICIARY_PATTERNS, profile):
+                self.by_beneficiary[tag].add(scheme.id)
+            for tag in _tags(_BENEFIT_PATTERNS, profile):
+                self.by_benefit[tag].add(scheme.id)
+
+            for token in name_tokens(scheme.scheme_name + " " + " ".join(self._acronyms(scheme))):
+                if len(token) >= 3 and token not in GENERIC_NAME_TOKENS:
+                    self.by_name_token[token].add(scheme.id)
+
+        n = len(schemes)
+        self.idf = {token: math.log(1 + n / len(ids)) for token, ids in self.by_name_token.items()}
+        self.distinctive_df = max(1, n // 20)
+        for token in self.by_name_token:
+            for gram in trigrams(token):
+                self.token_trigrams[gram].add(token)
+        logger.info(f"Scheme catalogue loaded with {n} schemes and {len(self.by_name_token)} name tokens.")
+
+    @staticmethod
+    def _acronyms(scheme):
+        # Abbreviations used in the text for this scheme, e.g. "(JSY)" for Janani Suraksha Yojana;
+        # other bracketed abbreviations (BPL, NFSA) do not spell the name's initials and are ignored.
+        initials = "".join(word[0] for word in _TOKEN_RE.findall(scheme.scheme_name.lower()))
+        text = " ".join(getattr(scheme, field) for field in FIELDS)
+        return [a for a in _ACRONYM_RE.findall(text) if a.replace("-", "").lower() in initials]
+
+    @classmethod
+    def from_json(cls, path=SCHEMES_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        schemes = [
+            Scheme(id=i, **{field: str(entry.get(field, "") or "").strip() for field in FIELDS})
+            for i, entry in enumerate(data)
+        ]
+        return cls(schemes)
+
+    # ---------------- Name Lookup ---------------- #
+    def _fuzzy_token(self, token):
+        # Closest indexed name token by trigram Dice similarity, e.g. "ayushmann" -> "ayushman".
+        if token in self.by_name_token:
+            return token
+        grams = trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self.token_trigrams.get(gram, ()):
+                shared[candidate] += 1
+        best, best_score = None, FUZZY_MIN_DICE
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + len(trigrams(candidate)))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _rank_names(self, text):
+        # (schemes named in `text` best first, whether every name token matched exactly).
+        scores = defaultdict(float)
+        distinctive = set()
+        exact = True
+        for token in set(name_tokens(text)):
+            if len(token) < 3 or token in GENERIC_NAME_TOKENS:
+                continue
+            matched = self._fuzzy_token(token)
+            if matched is None:
+                continue
+            exact = exact and matched == token
+            ids = self.by_name_token[matched]
+            for scheme_id in ids:
+                scores[scheme_id] += self.idf[matched]
+                if len(ids) <= self.distinctive_df:
+                    distinctive.add(scheme_id)
+        ranked = sorted(distinctive, key=lambda i: (-scores[i], i))
+        return [self.schemes[i] for i in ranked], exact
+
+    def match_names(self, text):
+        # Schemes named in `text`, best first. A scheme needs at least one distinctive name token.
+        return self._rank_names(text)[0]
+
+    # ---------------- Field Filters ---------------- #
+    def states_in(self, text):
+        return {_STATE_NAMES[m.group()] for m in _STATE_PATTERN.finditer(text.lower())}
+
+    def filter(self, states=(), beneficiaries=(), benefits=()):
+        # Intersection across dimensions, union within one; a state also includes national schemes.
+        selected = None
+        if states:
+            selected = set(self.by_state.get(NATIONAL, ()))
+            for state in states:
+                selected |= self.by_state.get(state, set())
+        for index, tags in ((self.by_beneficiary, beneficiaries), (self.by_benefit, benefits)):
+            if tags:
+                ids = set().union(*(index.get(tag, set()) for tag in tags))
+                selected = ids if selected is None else selected & ids
+        if selected is None:
+            return []
+        # State-specific schemes before national ones.
+        ranked = sorted(selected, key=lambda i: (self.schemes[i].applicable_state == NATIONAL, i))
+        return [self.schemes[i] for i in ranked]
+
+    def lookup(self, question, max_results=MAX_RESULTS):
+        text = question.lower()
+        fields = tuple(sorted(_tags(_FIELD_PATTERNS, text)))
+        named, exact = self._rank_names(question)
+        if named:
+            # Confident: one scheme, named without fuzzy matching, asked only about fields its record holds.
+            confident = (
+                exact and len(named) == 1 and bool(fields) and set(fields) <= RECORD_ONLY_FIELDS
+                and all(getattr(named[0], field) for field in fields)
+            )
+            return SchemeMatch(named[:max_results], fields, "name", confident)
+        states = self.states_in(text)
+        beneficiaries = _tags(_BENEFICIARY_PATTERNS, text)
+        benefits = _tags(_BENEFIT_PATTERNS, text)
+        filtered = self.filter(states, beneficiaries, benefits)
+        return SchemeMatch(filtered[:max_results], fields, "filter" if filtered else None, False)
+
+    def format_context(self, match):
+        # Compact records for the prompt; when the question asks about specific fields, only those.
+        fields = CORE_FIELDS + match.fields if match.fields else FIELDS
+        blocks = []
+        for scheme in match.schemes:
+            lines = [
+                f"{field.replace('_', ' ').title()}: {getattr(scheme, field)}"
+                for field in fields if getattr(scheme, field)
+            ]
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up schemes in the structured catalogue.")
+    parser.add_argument("question")
+    parser.add_argument("--file", default=SCHEMES_FILE)
+    args = parser.parse_args(argv)
+
+    catalogue = SchemeCatalogue.from_json(args.file)
+    match = catalogue.lookup(args.question)
+    print(f"{len(match.schemes)} match(es) by {match.reason}; fields: {', '.join(match.fields) or 'all'}; "
+          f"{'answered from the catalogue' if match.confident else 'added to retrieved context'}\n")
+    print(catalogue.format_context(match))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# Front-end independent core of Maya: answers, alerts and nearby search over the shared resource registry.
+# Both the Streamlit UI (app.py) and the HTTP API (modules/api.py) call these functions, so they share
+# one set of loaded models, indexes and LLM clients, and one limit on concurrent LLM calls.
+
+from modules.resources import (SECTION_FILES, ServiceBusy, get_rag_chain, get_history_summarizer, get_session_store,
+                               get_llm_gate, get_scheme_catalogue, is_loaded)
+from modules.observability import get_logger
+
+logger = get_logger("service")
+
+
+# ---------------- Chat ---------------- #
+def load_section(section):
+    return get_rag_chain(section)
+
+
+def new_memory():
+    from rag_pipeline.memory import ConversationMemory
+    return ConversationMemory(summarizer=get_history_summarizer())
+
+
+def session_memory(section, session_id):
+    return get_session_store().get(f"{section}:{session_id}")
+
+
+def stream_answer(section, question, memory):
+    # Yields the answer as it is generated. The question must already be in `memory`; the answer is
+    # added once the stream ends, including a partial answer if the caller stops early. If the request
+    # fails before any token (e.g. ServiceBusy when every LLM slot is taken and the wait queue is full),
+    # the question is taken back out of `memory`, so the next prompt has no unanswered turn in it.
+    if section not in SECTION_FILES:
+        raise KeyError(f"Unknown section: {section}")
+    rag_chain = get_rag_chain(section)
+    parts = []
+    try:
+        for token in rag_chain.stream({"question": question, "chat_history": memory}):
+            parts.append(token)
+            yield token
+    except Exception:
+        if not parts:
+            memory.discard_last("user", question)
+        raise
+    finally:
+        if parts:
+            memory.add("assistant", "".join(parts))
+
+
+def answer(section, question, memory):
+    return "".join(stream_answer(section, question, memory))
+
+
+def lookup_schemes(question):
+    match = get_scheme_catalogue().lookup(question)
+    return {"match": match.reason, "confident": match.confident, "fields": list(match.fields),
+            "schemes": [s._asdict() for s in match.schemes]}
+
+
+# ---------------- Alerts and Nearby ---------------- #
+def latest_alerts(states):
+    # Precomputed by the offline job (python -m modules.alerts); returns None if nothing was ingested yet.
+    from modules.alert_store import AlertStore
+
+    store = AlertStore()
+    report = store.latest_report()
+    if report is None:
+        return None
+    return {"report": report, "states": store.state_alerts(report["report_hash"], states)}
+
+
+def outbreak_trends(states, weeks=12):
+    # Weekly case/death totals and the leading diseases per state, from the columnar outbreak dataset.
+    import datetime
+    from modules.outbreak_store import get_dataset
+
+    dataset = get_dataset()
+    since = datetime.date.today() - datetime.timedelta(weeks=weeks)
+    return {
+        state: {
+            "weekly": dataset.weekly_totals(state=state, since=since),
+            "top_diseases": [
+                {"disease": disease, "outbreaks": outbreaks, "cases": cases, "deaths": deaths}
+                for disease, outbreaks, cases, deaths in dataset.top_diseases(state=state, since=since)
+            ],
+        }
+        for state in states
+    }
+
+
+def nearby(pincode):
+    from modules.nearby import find_nearby
+    return find_nearby(pincode)
+
+
+# ---------------- Health ---------------- #
+def readiness():
+    sections = {section: is_loaded(f"rag_chain:{section}") for section in SECTION_FILES}
+    return {"ready": all(sections.values()), "sections": sections, "llm": get_llm_gate().stats()}
@@ -0,0 +1,23 @@
+# States and union territories of India, with the alternative spellings found in reports and questions.
+# Shared by the IDSP alerts pipeline and the scheme catalogue.
+
+ALL_STATES = [
+    "Andhra Pradesh","Arunachal Pradesh","Assam","Bihar","Chhattisgarh","Goa","Gujarat",
+    "Haryana","Himachal Pradesh","Jharkhand","Karnataka","Kerala","Madhya Pradesh","Maharashtra",
+    "Manipur","Meghalaya","Mizoram","Nagaland","Odisha","Punjab","Rajasthan","Sikkim","Tamil Nadu",
+    "Telangana","Tripura","Uttar Pradesh","Uttarakhand","West Bengal","Delhi","Jammu & Kashmir",
+    "Ladakh","Puducherry","Chandigarh"
+]
+
+# Lower-cased alternative or outdated names -> canonical name in ALL_STATES.
+STATE_ALIASES = {
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "nct of delhi": "Delhi",
+    "j&k": "Jammu & Kashmir",
+    "j & k": "Jammu & Kashmir",
+    "jammu and kashmir": "Jammu & Kashmir",
+    "uttaranchal": "Uttarakhand",
+    "chattisgarh": "Chhattisgarh",
+    "telengana": "Telangana",
+}
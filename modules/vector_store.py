@@ -1,47 +1,157 @@
 import os
+import json
+import shutil
+import hashlib
 from langchain.vectorstores import Chroma
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
+from modules.document_loader import iter_documents, iter_batches, ingest_pool
+from modules.embeddings import EMBEDDING_MODEL, LazyEmbeddings
+from modules.observability import get_logger
 
-def get_vector_db(documents=None):
-   
+logger = get_logger("vector_store")
 
-    persist_directory = "chroma_db"
+PERSIST_ROOT = "chroma_db"
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+PAGE_BATCH_SIZE = 32
+EMBED_BATCH_SIZE = 64
 
-    
-    hf_token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-    if not hf_token:
-        raise EnvironmentError("Please set the HUGGINGFACEHUB_API_TOKEN environment variable.")
 
-    
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={"device": "cpu"}
-    )
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    
-    if os.path.exists(persist_directory) and os.listdir(persist_directory):
+
+def _chunk_ids(chunks, seen):
+    # Chunk ids are content hashes, so an unchanged chunk keeps its id across
+    # re-ingestion; repeated identical chunks within a file get an occurrence suffix.
+    ids = []
+    for chunk in chunks:
+        key = "\0".join([
+            str(chunk.metadata.get("source", "")),
+            str(chunk.metadata.get("page", "")),
+            chunk.page_content,
+        ])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        seen[digest] = seen.get(digest, 0) + 1
+        ids.append(digest if seen[digest] == 1 else f"{digest}-{seen[digest]}")
+    return ids
+
+
+# ---------------- Per-Section Index Manager ---------------- #
+class SectionIndex:
+    # One persistent Chroma collection per section, kept in sync with its source
+    # files through a manifest of file and chunk hashes.
+
+    def __init__(self, section, file_paths, embeddings=None, persist_root=PERSIST_ROOT):
+        self.section = section
+        self.file_paths = list(file_paths)
+        self.embeddings = embeddings or LazyEmbeddings()
+        self.persist_directory = os.path.join(persist_root, section)
+        self.manifest_path = os.path.join(self.persist_directory, MANIFEST_NAME)
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+    def _settings(self):
+        return {
+            "version": MANIFEST_VERSION,
+            "embedding_model": EMBEDDING_MODEL,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+        }
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
         try:
-            return Chroma(
-                persist_directory=persist_directory,
-                embedding_function=embeddings
-            )
-        except:
-            pass  
-
-   
-    if not documents:
-        raise ValueError("No vector DB found and no documents provided to create one.")
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
-    split_docs = text_splitter.split_documents(documents)
-
-    db = Chroma.from_documents(
-        split_docs,
-        embeddings,
-        persist_directory=persist_directory
-    )
-    db.persist()
-    return db
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, files):
+        manifest = dict(self._settings(), files=files)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _open_collection(self):
+        return Chroma(
+            collection_name=f"maya_{self.section}",
+            persist_directory=self.persist_directory,
+            embedding_function=self.embeddings
+        )
+
+    def _iter_chunk_batches(self, file_path, executor=None):
+        # Pages stream from the loader, are split a batch at a time and handed to the
+        # embedder in fixed-size batches, so no file is ever held in memory whole.
+        for pages in iter_batches(iter_documents([file_path], executor=executor), PAGE_BATCH_SIZE):
+            chunks = self.text_splitter.split_documents(pages)
+            yield from iter_batches(chunks, EMBED_BATCH_SIZE)
+
+    def sync(self):
+        manifest = self._read_manifest()
+        if manifest is not None and {k: manifest.get(k) for k in self._settings()} != self._settings():
+            logger.info(f"Index settings changed for '{self.section}', rebuilding.")
+            shutil.rmtree(self.persist_directory, ignore_errors=True)
+            manifest = None
+
+        os.makedirs(self.persist_directory, exist_ok=True)
+        old_files = manifest["files"] if manifest else {}
+
+        current_hashes = {}
+        for file_path in self.file_paths:
+            if not os.path.exists(file_path):
+                logger.warning(f"File not found: {file_path}")
+                continue
+            current_hashes[file_path] = _file_sha256(file_path)
+
+        changed = [p for p, h in current_hashes.items() if old_files.get(p, {}).get("sha256") != h]
+        removed = [p for p in old_files if p not in current_hashes]
+
+        db = self._open_collection()
+        if not changed and not removed:
+            logger.info(f"Index for '{self.section}' is up to date ({len(current_hashes)} files).")
+            return db
+
+        files = {p: old_files[p] for p in current_hashes if p in old_files}
+        stale_ids = []
+        for file_path in removed:
+            stale_ids.extend(old_files[file_path].get("chunks", []))
+
+        added = 0
+        # One parsing pool for the whole sync rather than one per changed file
+        with ingest_pool() as executor:
+            for file_path in changed:
+                old_ids = set(old_files.get(file_path, {}).get("chunks", []))
+                ids = []
+                seen = {}
+                for chunks in self._iter_chunk_batches(file_path, executor):
+                    batch_ids = _chunk_ids(chunks, seen)
+                    ids.extend(batch_ids)
+                    fresh = [(i, c) for i, c in zip(batch_ids, chunks) if i not in old_ids]
+                    if fresh:
+                        db.add_documents([c for _, c in fresh], ids=[i for i, _ in fresh])
+                        added += len(fresh)
+
+                stale_ids.extend(old_ids - set(ids))
+                files[file_path] = {"sha256": current_hashes[file_path], "chunks": ids}
+
+        if stale_ids:
+            db.delete(ids=stale_ids)
+
+        db.persist()
+        self._write_manifest(files)
+        logger.info(f"Index for '{self.section}': {added} chunks embedded, {len(stale_ids)} removed.")
+        return db
+
 
+def get_vector_db(section, file_paths, embeddings=None, persist_root=PERSIST_ROOT):
+    # Opens (building or updating as needed) the index of one section under persist_root/<section>.
+    return SectionIndex(section, file_paths, embeddings=embeddings, persist_root=persist_root).sync()
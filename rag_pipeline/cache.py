@@ -0,0 +1,86 @@
+# Semantic response cache placed in front of llm.invoke.
+# Questions are matched by cosine similarity of their embeddings within a bucket
+# (section + detected language), with LRU and TTL eviction and a hard size bound.
+
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+CACHE_THRESHOLD = float(os.getenv("MAYA_CACHE_THRESHOLD", "0.92"))
+CACHE_MAX_SIZE = int(os.getenv("MAYA_CACHE_MAX_SIZE", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("MAYA_CACHE_TTL_SECONDS", "3600"))
+
+
+class SemanticCache:
+
+    def __init__(self, embed_fn, threshold=CACHE_THRESHOLD, max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # entry id -> (bucket, vector, response, created_at), in LRU order
+        self._buckets = {}              # bucket -> set of entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def embed(self, question):
+        vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict(self, entry_id):
+        bucket = self._entries.pop(entry_id)[0]
+        ids = self._buckets.get(bucket)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._buckets[bucket]
+
+    def _expire(self, now):
+        # Entries are in LRU order, not age order, so scan for expired ones.
+        expired = [i for i, entry in self._entries.items() if now - entry[3] > self.ttl]
+        for entry_id in expired:
+            self._evict(entry_id)
+
+    def get(self, vector, bucket):
+        with self._lock:
+            self._expire(time.monotonic())
+            ids = list(self._buckets.get(bucket, ()))
+            if ids:
+                matrix = np.stack([self._entries[i][1] for i in ids])
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._entries.move_to_end(ids[best])
+                    self.hits += 1
+                    return self._entries[ids[best]][2]
+            self.misses += 1
+            return None
+
+    def put(self, vector, bucket, response):
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (bucket, vector, response, time.monotonic())
+            self._buckets.setdefault(bucket, set()).add(entry_id)
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,174 @@
+# Request coalescing for traffic spikes.
+#
+# SingleFlight: identical in-flight requests share one producer. The first caller runs it; callers that
+# arrive while it is running receive the same chunks as they are produced, instead of starting their own
+# retrieval and LLM call.
+#
+# MicroBatcher: calls that arrive within a few milliseconds of each other are handed to one batch
+# function, e.g. one batched embedding call and one Chroma query for several questions.
+
+import os
+import threading
+from modules.observability import inc
+
+BATCH_WINDOW_MS = float(os.getenv("MAYA_BATCH_WINDOW_MS", "3"))
+BATCH_MAX_SIZE = int(os.getenv("MAYA_BATCH_MAX", "32"))
+
+
+def normalise_question(question):
+    return " ".join(question.lower().split()).rstrip("?.!। ")
+
+
+class _Flight:
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.followers = 0
+        self.cond = threading.Condition()
+
+
+class SingleFlight:
+
+    def __init__(self, name="flight"):
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key, produce):
+        # `produce()` returns an iterable of chunks; it is only called by the first caller for `key`.
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+        if leader:
+            return self._lead(key, flight, produce)
+        inc("maya_coalesced_requests_total", flight=self.name)
+        return self._follow(flight)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def _detach(self, key, flight):
+        # Stops new callers from joining and returns how many are already waiting.
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            return flight.followers
+
+    def _publish(self, flight, part):
+        with flight.cond:
+            flight.parts.append(part)
+            flight.cond.notify_all()
+
+    def _lead(self, key, flight, produce):
+        source = iter(produce())
+        try:
+            for part in source:
+                self._publish(flight, part)
+                yield part
+        except GeneratorExit:
+            # Our own caller went away; if others are waiting on this answer, finish it for them.
+            if self._detach(key, flight):
+                try:
+                    for part in source:
+                        self._publish(flight, part)
+                except Exception as e:
+                    flight.error = e
+            raise
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._detach(key, flight)
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def _follow(self, flight):
+        seen = 0
+        while True:
+            with flight.cond:
+                while seen >= len(flight.parts) and not flight.done:
+                    flight.cond.wait()
+                parts = flight.parts[seen:]
+                done = flight.done
+            for part in parts:
+                yield part
+            seen += len(parts)
+            if done:
+                if flight.error is not None:
+                    raise flight.error
+                return
+
+
+class _Call:
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.ready = threading.Event()
+
+
+class MicroBatcher:
+    # The first caller of a batch runs `batch_fn(items)` for everyone, which must return one result per item in
+    # the same order. With no other batch in flight it runs at once, so a lone request never waits. While a
+    # batch is running, the next leader collects callers for up to `window_ms`, until `max_size` calls have
+    # queued, or until the running batch finishes, whichever comes first.
+
+    def __init__(self, batch_fn, window_ms=BATCH_WINDOW_MS, max_size=BATCH_MAX_SIZE, name="batch"):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_size = max(1, max_size)
+        self.name = name
+        self._pending = []
+        self._running = 0
+        self._cond = threading.Condition()
+
+    def submit(self, item):
+        call = _Call(item)
+        with self._cond:
+            self._pending.append(call)
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_size:
+                self._cond.notify_all()
+            if leader:
+                if self._running:
+                    self._cond.wait_for(lambda: len(self._pending) >= self.max_size or not self._running,
+                                        timeout=self.window)
+                batch, self._pending = self._pending, []
+                self._running += 1
+        if leader:
+            try:
+                self._run(batch)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+        call.ready.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, batch):
+        inc("maya_batches_total", batch=self.name)
+        inc("maya_batched_items_total", len(batch), batch=self.name)
+        try:
+            results = self.batch_fn([call.item for call in batch])
+        except Exception as e:
+            for call in batch:
+                call.error = e
+                call.ready.set()
+            return
+        for call, result in zip(batch, results):
+            call.result = result
+            call.ready.set()
@@ -0,0 +1,113 @@
+# Context caching for sections whose whole reference document fits in the prompt (e.g. the Emergency
+# first-aid manual). The fixed system text plus the full document become a preamble that is uploaded
+# once. Each request then sends only the language line, the history and the question, and does not
+# run retrieval.
+#
+#   MAYA_CONTEXT_CACHE=off      (default) normal retrieval-augmented prompts
+#   MAYA_CONTEXT_CACHE=gemini   Gemini context-caching API; cached input tokens are billed at a reduced rate
+#   MAYA_CONTEXT_CACHE=local    in-process stand-in with the same request layout, for development and
+#                               benchmarks without API access; it inlines the preamble in every prompt
+
+import os
+import time
+import datetime
+import threading
+from langchain.schema import HumanMessage
+from modules.observability import get_logger
+
+logger = get_logger("context_cache")
+
+CONTEXT_CACHE_MODE = os.getenv("MAYA_CONTEXT_CACHE", "off")
+CONTEXT_CACHE_SECTIONS = tuple(os.getenv("MAYA_CONTEXT_CACHE_SECTIONS", "emergency").split(","))
+CONTEXT_CACHE_TTL = int(os.getenv("MAYA_CONTEXT_CACHE_TTL", "3600"))
+CONTEXT_CACHE_MODEL = os.getenv("MAYA_CONTEXT_CACHE_MODEL", "gemini-2.0-flash-001")
+RECREATE_RETRY_SECONDS = 60
+
+
+class LocalPreamble:
+
+    def __init__(self, section, system_text, document_text):
+        self.section = section
+        self.system_text = system_text
+        self.document_text = document_text
+        self.llm = None   # use the chain's own LLM
+
+    def ready(self):
+        return True
+
+    def messages(self, system_message, language_line, tail):
+        return [system_message, HumanMessage(content=f"Reference document:\n{self.document_text}\n\n{tail}")]
+
+
+class GeminiPreamble:
+
+    def __init__(self, section, system_text, document_text, llm_factory, ttl=CONTEXT_CACHE_TTL):
+        self.section = section
+        self.system_text = system_text
+        self.document_text = document_text
+        self.llm_factory = llm_factory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+        self._create()
+
+    def _create(self):
+        # Uploads the preamble and points self.llm at the new cache name; raises if the API call fails.
+        from google.generativeai import caching
+
+        self._cached = caching.CachedContent.create(
+            model=f"models/{CONTEXT_CACHE_MODEL}",
+            display_name=f"maya-{self.section}",
+            system_instruction=self.system_text,
+            contents=[self.document_text],
+            ttl=datetime.timedelta(seconds=self.ttl),
+        )
+        self._expires_at = time.monotonic() + self.ttl
+        self.llm = self.llm_factory(self._cached.name)
+        logger.info(f"Created Gemini context cache {self._cached.name} for '{self.section}'.")
+
+    def ready(self):
+        # Keeps the cache usable: extends the TTL once half of it has passed, and creates the cache again
+        # if it has expired (no traffic for a whole TTL) or cannot be extended. Returns False while it is
+        # unavailable, and the chain then uses retrieval; creation is retried every RECREATE_RETRY_SECONDS.
+        with self._lock:
+            now = time.monotonic()
+            if self._cached is not None and self._expires_at - now > self.ttl / 2:
+                return True
+            if self._cached is not None and self._expires_at > now:
+                try:
+                    self._cached.update(ttl=datetime.timedelta(seconds=self.ttl))
+                    self._expires_at = time.monotonic() + self.ttl
+                    return True
+                except Exception as e:
+                    logger.warning(f"Could not extend context cache for '{self.section}', recreating it: {e}")
+            if now < self._retry_at:
+                return False
+            try:
+                self._create()
+                return True
+            except Exception as e:
+                self._cached = None
+                self._retry_at = now + RECREATE_RETRY_SECONDS
+                logger.warning(f"Gemini context cache unavailable for '{self.section}', using retrieval: {e}")
+                return False
+
+    def messages(self, system_message, language_line, tail):
+        # The system text lives in the cache, so the per-language line moves into the user turn.
+        return [HumanMessage(content=f"{language_line}\n\n{tail}")]
+
+
+def create_preamble(section, system_text, document_text, llm_factory, mode=CONTEXT_CACHE_MODE):
+    # Returns None when caching is off for this section or the cache cannot be created,
+    # in which case the chain keeps using retrieval.
+    if mode == "off" or section not in CONTEXT_CACHE_SECTIONS:
+        return None
+    if mode == "local":
+        return LocalPreamble(section, system_text, document_text)
+    if mode == "gemini":
+        try:
+            return GeminiPreamble(section, system_text, document_text, llm_factory)
+        except Exception as e:
+            logger.warning(f"Gemini context cache unavailable for '{section}', using retrieval: {e}")
+            return None
+    raise ValueError(f"Unknown context cache mode: {mode}")
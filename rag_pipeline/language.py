@@ -0,0 +1,101 @@
+# Script/language detection for user questions.
+# Non-Latin text is classified by Unicode block (Devanagari and the other Indic scripts); Latin text is
+# scored against a compact Hinglish lexicon plus a few romanised-Hindi verb endings, and needs at least
+# one Hindi function word to count as Hinglish. The result is deterministic and memoised, so repeated
+# questions cost a dictionary lookup.
+
+import re
+from functools import lru_cache
+
+# (first code point, last code point, label)
+SCRIPT_BLOCKS = (
+    (0x0900, 0x097F, "Hindi-Devanagari"),
+    (0x0980, 0x09FF, "Bengali"),
+    (0x0A00, 0x0A7F, "Punjabi-Gurmukhi"),
+    (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B00, 0x0B7F, "Odia"),
+    (0x0B80, 0x0BFF, "Tamil"),
+    (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"),
+    (0x0D00, 0x0D7F, "Malayalam"),
+    (0x0600, 0x06FF, "Urdu"),
+)
+
+# Hindi function words: pronouns, question words, auxiliaries, postpositions and common verbs.
+# A question needs at least one of these to be Hinglish, so English questions that mention Hindi
+# names (Ayushman Bharat Yojana, tulsi, neem) stay English.
+HINDI_FUNCTION_WORDS = frozenset("""
+hai hain hoon tha thi kya kyu kyun kaise kaisa kaisi kab kahan kaun kitna kitne kitni
+mujhe mujhko mera meri mere hamara hamare tumhara aapka unka uska iska
+nahi nahin bhi aur lekin kyunki agar sirf bahut thoda zyada kuch
+ka ki ke se mein liye saath pehle baad abhi
+karo karna karein karta karti karte kijiye kiya hota hoti hote hoga hogi honge raha rahi rahe
+batao bataye bataiye chahiye chahie sakta sakti sakte milega milegi jaye
+""".split())
+
+# Romanised Hindi words that are not also English words, scheme names or herb names used in English.
+HINGLISH_LEXICON = HINDI_FUNCTION_WORDS | frozenset("""
+hu hum tum aap apna apni haan toh wala wali wale bina bolo dena jao
+dard bukhar bukhaar khansi zukam jukam sardi garmi chot jalna ulti dast kamzori
+dawai dawa ilaj upay nuskha gharelu aushadhi adrak shahad kadha
+bachcha bacche aurat budhe gaon
+""".split())
+
+# English words that the shape rules below would otherwise misread as Hinglish.
+ENGLISH_STOPWORDS = frozenset("""
+a an the is are was were be been am do does did to of in on at by for with from and or not no
+what how why when where who which this that these those it its i me my we our you your he she they
+can could should would will shall may might must have has had get got give take
+""".split())
+
+SUPPORTED_LANGUAGES = tuple(label for _, _, label in SCRIPT_BLOCKS) + ("Hinglish", "English")
+
+# Verb endings only; consonant clusters (kh, bh, dh) also occur in names such as "Bharat".
+_HINGLISH_SHAPES = re.compile(r"^[a-z]+(?:iye|iyo|enge|engi|ega|egi|oge|ogi|aaye|aiye)$")
+_WORD_RE = re.compile(r"[a-z]+")
+HINGLISH_THRESHOLD = 0.3
+
+
+def _script_of(char):
+    code = ord(char)
+    for start, end, label in SCRIPT_BLOCKS:
+        if start <= code <= end:
+            return label
+    return None
+
+
+def hinglish_score(text):
+    # Fraction of words that look like romanised Hindi: lexicon hits count fully, word shapes by half.
+    words = _WORD_RE.findall(text.lower())
+    if not any(word in HINDI_FUNCTION_WORDS for word in words):
+        return 0.0
+    score = 0.0
+    for word in words:
+        if word in HINGLISH_LEXICON:
+            score += 1.0
+        elif word not in ENGLISH_STOPWORDS and len(word) > 2 and _HINGLISH_SHAPES.match(word):
+            score += 0.5
+    return score / len(words)
+
+
+@lru_cache(maxsize=4096)
+def detect_script_language(text):
+    script_counts = {}
+    latin_letters = 0
+    for char in text:
+        if char.isascii():
+            if char.isalpha():
+                latin_letters += 1
+            continue
+        label = _script_of(char)
+        if label is not None:
+            script_counts[label] = script_counts.get(label, 0) + 1
+
+    if script_counts:
+        label, count = max(script_counts.items(), key=lambda item: (item[1], item[0]))
+        if count >= latin_letters:
+            return label
+
+    if hinglish_score(text) >= HINGLISH_THRESHOLD:
+        return "Hinglish"
+    return "English"
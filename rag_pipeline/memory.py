@@ -0,0 +1,180 @@
+# Bounded, per-session conversation memory.
+# Messages live in a ring buffer; the prompt gets the newest turns that fit a token budget, and turns
+# pushed out of the buffer can be folded into a rolling summary by an optional summariser. Summaries are
+# written on a small background pool, never on the request path.
+
+import os
+import time
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from rag_pipeline.retrieval import estimate_tokens
+
+MEMORY_MAX_MESSAGES = int(os.getenv("MAYA_MEMORY_MAX_MESSAGES", "40"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("MAYA_HISTORY_TOKENS", "800"))
+RENDER_MESSAGES = int(os.getenv("MAYA_RENDER_MESSAGES", "20"))
+SUMMARY_BATCH = 6
+MAX_SESSIONS = int(os.getenv("MAYA_MAX_SESSIONS", "1000"))
+SESSION_IDLE_SECONDS = float(os.getenv("MAYA_SESSION_IDLE_SECONDS", "3600"))
+SUMMARY_WORKERS = int(os.getenv("MAYA_SUMMARY_WORKERS", "2"))
+
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def get_summary_executor():
+    global _summary_executor
+    if _summary_executor is None:
+        with _summary_executor_lock:
+            if _summary_executor is None:
+                _summary_executor = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="maya-summary")
+    return _summary_executor
+
+
+def trim_history(messages, token_budget=HISTORY_TOKEN_BUDGET):
+    # Newest messages first until the budget is spent; always keeps at least the last message.
+    selected = []
+    used = 0
+    for msg in reversed(messages):
+        cost = estimate_tokens(msg["content"])
+        if selected and used + cost > token_budget:
+            break
+        selected.append(msg)
+        used += cost
+    return selected[::-1]
+
+
+class ConversationMemory:
+
+    def __init__(self, max_messages=MEMORY_MAX_MESSAGES, token_budget=HISTORY_TOKEN_BUDGET, summarizer=None):
+        self.messages = deque(maxlen=max_messages)
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.summary = ""
+        self._evicted = []
+        self._summarizing = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(list(self.messages))
+
+    def append(self, message):
+        with self._lock:
+            if len(self.messages) == self.messages.maxlen:
+                self._evicted.append(self.messages[0])
+            self.messages.append(message)
+            if self.summarizer is None:
+                self._evicted.clear()
+                return
+            start = not self._summarizing and len(self._evicted) >= SUMMARY_BATCH
+            if start:
+                self._summarizing = True
+        if start:
+            get_summary_executor().submit(self._summarize)
+
+    def _summarize(self):
+        # One summariser run at a time per conversation; turns evicted meanwhile are folded in by the next loop.
+        while True:
+            with self._lock:
+                if len(self._evicted) < SUMMARY_BATCH:
+                    self._summarizing = False
+                    return
+                evicted, self._evicted = self._evicted, []
+                summary = self.summary
+            try:
+                summary = self.summarizer(summary, evicted)
+            except Exception:
+                pass
+            with self._lock:
+                self.summary = summary
+
+    def add(self, role, content):
+        self.append({"role": role, "content": content})
+
+    def discard_last(self, role, content):
+        # Takes back the newest message if it is this one, e.g. a question whose request was rejected.
+        with self._lock:
+            if self.messages and self.messages[-1] == {"role": role, "content": content}:
+                self.messages.pop()
+                return True
+            return False
+
+    def window(self, token_budget=None):
+        with self._lock:
+            messages = list(self.messages)
+        return trim_history(messages, self.token_budget if token_budget is None else token_budget)
+
+    def has_assistant_turn(self):
+        # Over the whole conversation, including turns trimmed from the window or folded into the summary.
+        with self._lock:
+            return bool(self.summary) or self._summarizing or any(msg["role"] == "assistant" for msg in (*self._evicted, *self.messages))
+
+    def recent(self, n=RENDER_MESSAGES):
+        with self._lock:
+            return list(self.messages)[-n:]
+
+
+def make_llm_summarizer(llm, max_chars=1200):
+    def summarize(summary, messages):
+        transcript = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+        prompt = (
+            "Update the running summary of a conversation between a user and Maya, a health assistant. "
+            "Keep health concerns, locations and schemes mentioned; drop greetings. Reply with the summary only.\n\n"
+            f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+        )
+        try:
+            result = llm.invoke(prompt)
+        except Exception:
+            return summary
+        result = result.content if hasattr(result, "content") else result
+        return result[:max_chars]
+    return summarize
+
+
+def history_window(history, token_budget=HISTORY_TOKEN_BUDGET):
+    # Accepts a ConversationMemory or a plain list of {"role", "content"} dicts.
+    if isinstance(history, ConversationMemory):
+        return history.window(token_budget), history.summary
+    return trim_history(list(history), token_budget), ""
+
+
+def has_prior_exchange(history):
+    # True once the conversation has an answer a new question could be following up on.
+    if isinstance(history, ConversationMemory):
+        return history.has_assistant_turn()
+    return any(msg["role"] == "assistant" for msg in history)
+
+
+class SessionMemoryStore:
+    # Conversation memories keyed by session id, with a cap on sessions and idle expiry,
+    # so process memory stays flat however many users connect.
+
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_seconds=SESSION_IDLE_SECONDS, factory=ConversationMemory):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.factory = factory
+        self._sessions = OrderedDict()   # session id -> (memory, last_used)
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            while self._sessions:
+                oldest_id, (_, last_used) = next(iter(self._sessions.items()))
+                if now - last_used <= self.idle_seconds:
+                    break
+                del self._sessions[oldest_id]
+
+            memory = self._sessions.pop(session_id, (None, None))[0]
+            if memory is None:
+                memory = self.factory()
+            self._sessions[session_id] = (memory, now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return memory
+
+    def __len__(self):
+        return len(self._sessions)
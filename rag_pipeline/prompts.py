@@ -1,4 +1,7 @@
 # rag_pipeline/prompts.py
+from functools import lru_cache
+
+HISTORY_GUIDANCE = "Use the previous conversation only if it is there ,and relevant context to answer clearly. If user asks for general recipes, check the previous health concern only if present in the conversation and provide recipes relevant to that."
 
 def get_system_prompt(context_type="all"):
    
@@ -50,3 +53,19 @@ based only on trusted documents provided.
 """
 
     return base_prompt
+
+
+@lru_cache(maxsize=None)
+def build_system_prompt(context_type="all"):
+    # Everything in the system text that does not depend on the question; identical across requests.
+    return get_system_prompt(context_type) + "\n" + HISTORY_GUIDANCE
+
+
+def language_instruction(language):
+    return f"Respond in the same script/language as the user input, which is: {language}."
+
+
+def compile_system_prompts(context_type, languages):
+    # One finished system text per language, built once when the chain is created.
+    base = build_system_prompt(context_type)
+    return {language: f"{base}\n\n{language_instruction(language)}" for language in languages}
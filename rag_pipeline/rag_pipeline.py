@@ -1,103 +1,208 @@
 #building a rag pipeline each time user asks query this flow will be followed
 
-from langchain.prompts import ChatPromptTemplate
-
 from langchain.schema.runnable import Runnable
-from langdetect import detect
-from langchain.schema import Document
+from langchain.schema import Document, AIMessage, SystemMessage, HumanMessage
 import os
+import time
+import logging
+from functools import lru_cache
 from dotenv import load_dotenv
+from modules.observability import get_logger, span, observe
 load_dotenv()
 api_key = os.getenv("GOOGLE_API_KEY")
+logger = get_logger("rag_pipeline")
 
 
 
 
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI as GeminiLLM
-    print("[INFO] Using ChatGoogleGenerativeAI")
-except ImportError:
-    from langchain_google_genai import GoogleGenerativeAI as GeminiLLM
-    print("[INFO] Using GoogleGenerativeAI")
-
-from rag_pipeline.prompts import get_system_prompt
+from rag_pipeline.prompts import compile_system_prompts, language_instruction
+from rag_pipeline.retrieval import HybridRetriever
+from rag_pipeline.memory import history_window, has_prior_exchange
+from rag_pipeline.language import detect_script_language, SUPPORTED_LANGUAGES
+from rag_pipeline.coalescing import normalise_question
 
-SECTION_HISTORIES = {
-    "remedies": [],
-    "schemes": [],
-    "emergency": []
-}
 
-
-def detect_script_language(text):
+@lru_cache(maxsize=1)
+def _gemini_class():
+    # Imported on first use: the Gemini SDK is slow to import and not needed to open an index or run offline.
     try:
-        lang = detect(text)
-        if lang == 'hi':
-            if any('\u0900' <= c <= '\u097F' for c in text):
-                return "Hindi-Devanagari"
-            else:
-                return "Hinglish"
-        elif lang == 'en':
-            return "English"
-        else:
-            if re.fullmatch(r'[a-zA-Z0-9\s\.,!?\'\"-]+', text):
-                return "English"
-    except:
-        return "English"
-
-
-def build_rag_chain(vector_db, context_type="all"):
-    retriever=vector_db.as_retriever(search_type="similarity", search_kwargs={"k": 10})
+        from langchain_google_genai import ChatGoogleGenerativeAI as GeminiLLM
+        logger.info("Using ChatGoogleGenerativeAI")
+    except ImportError:
+        from langchain_google_genai import GoogleGenerativeAI as GeminiLLM
+        logger.info("Using GoogleGenerativeAI")
+    return GeminiLLM
+
 
+def create_llm(model="gemini-2.0-flash", cached_content=None):
+    GeminiLLM = _gemini_class()
+    kwargs = {"cached_content": cached_content} if cached_content else {}
     if api_key:
-        print("[DEBUG] Gemini API Key loaded successfully.")
-        llm = GeminiLLM(model="gemini-2.0-flash", temperature=0.4, google_api_key=api_key)
-    else:
-        print("[WARNING] GOOGLE_API_KEY not found in .env! Falling back to ADC credentials.")
-        llm = GeminiLLM(model="gemini-2.0-flash", temperature=0.4)
+        logger.debug("Gemini API Key loaded successfully.")
+        return GeminiLLM(model=model, temperature=0.4, google_api_key=api_key, **kwargs)
+    logger.warning("GOOGLE_API_KEY not found in .env! Falling back to ADC credentials.")
+    return GeminiLLM(model=model, temperature=0.4, **kwargs)
 
 
+def build_rag_chain(vector_db, context_type="all", llm=None, cache=None, reranker=None, flights=None, catalogue=None,
+                    preamble=None):
+    retriever = HybridRetriever(vector_db, reranker=reranker)
+
+    if llm is None:
+        llm = create_llm()
+
+    # Precompiled once per chain: the finished system message for every language the detector can return.
+    # Prompts are laid out stable-first (system text, then retrieved context, then history, then the
+    # question), so providers can reuse the longest possible prefix between requests.
+    system_messages = {
+        language: SystemMessage(content=text)
+        for language, text in compile_system_prompts(context_type, SUPPORTED_LANGUAGES).items()
+    }
+
 
     def format_docs(docs):
        return "\n\n".join([doc.page_content for doc in docs])
 
-    def rag_chain_fn(inputs):
+    def prepare(inputs):
        question = inputs["question"]
-       section = inputs.get("section", "remedies")
-       history = inputs.get("chat_history", [])[-5:]
-       detected_lang = detect_script_language(question)
-
-       system_prompt = get_system_prompt(context_type)
-       system_prompt += "\nUse the previous conversation only if it is there ,and relevant context to answer clearly. If user asks for general recipes, check the previous health concern only if present in the conversation and provide recipes relevant to that."
-
-       system_prompt += f"\n\nRespond in the same script/language as the user input, which is: {detected_lang}."
-       print(f"[DEBUG] Section: {section}")
-       print(f"[DEBUG] Detected language: {detected_lang}")
-       print(f"[DEBUG] System prompt: {system_prompt}")
+       section = inputs.get("section", context_type)
+       chat_history = inputs.get("chat_history", [])
+       history, summary = history_window(chat_history)
+       with span("detect_language", chars=len(question)) as s:
+           detected_lang = detect_script_language(question)
+           s.set(language=detected_lang)
+       state = {"question": question, "section": section, "cached": None, "flight_key": None,
+                "cache_vector": None, "cache_bucket": (context_type, detected_lang)}
+
+       system_message = system_messages[detected_lang]
+       if logger.isEnabledFor(logging.DEBUG):
+           logger.debug(f"Section: {section}")
+           logger.debug(f"Detected language: {detected_lang}")
+           logger.debug(f"System prompt: {system_message.content}")
+           logger.debug(f"{len(history)} messages of chat history in the token budget:")
+           for i, msg in enumerate(history, 1):
+                logger.debug(f"  {i}. {msg['role'].capitalize()}: {msg['content']}")
 
         # Combine chat messages history
        history_text = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
+       if summary:
+           history_text = f"Summary of earlier conversation: {summary}\n{history_text}"
+
+        # Answers only depend on the question when there is no earlier exchange to follow up on; this looks at
+        # the whole conversation, since an answer trimmed out of the window can still be what "and for children?" refers to
+       standalone = not has_prior_exchange(chat_history)
+       if cache is not None and standalone:
+           with span("cache_lookup", section=context_type) as s:
+               state["cache_vector"] = cache.embed(question)
+               state["cached"] = cache.get(state["cache_vector"], state["cache_bucket"])
+               s.set(cache_hit=state["cached"] is not None)
+           if state["cached"] is not None:
+               logger.debug("Semantic cache hit")
+               return state
+       if flights is not None and standalone:
+           state["flight_key"] = (context_type, detected_lang, normalise_question(question))
+
+       state["system_message"] = system_message
+       state["language"] = detected_lang
+       state["history_text"] = history_text
+       return state
+
+    def assemble(state):
+       question = state["question"]
+       system_message = state["system_message"]
+       history_text = state["history_text"]
+       history_block = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
+       state["llm"] = llm
+
+        # With a context-cached preamble the whole reference document is already in the prefix;
+        # if the cache cannot be kept alive or recreated the normal retrieval prompt is used
+       if preamble is not None and preamble.ready():
+           with span("prompt_assembly", section=context_type, preamble=True) as s:
+               tail = f"{history_block}Question: {question}"
+               state["final_prompt"] = preamble.messages(system_message, language_instruction(state["language"]), tail)
+               state["prompt_chars"] = sum(len(m.content) for m in state["final_prompt"])
+               state["llm"] = preamble.llm or llm
+               s.set(prompt_chars=state["prompt_chars"])
+           return state
+
+        # Matching scheme records from the structured catalogue; only a confident name match replaces retrieval
+       records, confident = None, False
+       if catalogue is not None:
+           with span("catalogue_lookup", section=context_type) as s:
+               match = catalogue.lookup(question)
+               if match.schemes:
+                   records, confident = catalogue.format_context(match), match.confident
+               s.set(catalogue_hit=records is not None, records=len(match.schemes), confident=confident)
 
-       print("[DEBUG] Last 5 messages in chat history:")
-       for i, msg in enumerate(history, 1):
-            print(f"  {i}. {msg['role'].capitalize()}: {msg['content']}")
         # Retrieve relevant documents
-       docs = retriever.invoke(question)
-       context = format_docs(docs)
-
-        # Final formatted input to LLM
-       full_input = f"{history_text}\n\nContext:\n{context}\n\nQuestion: {question}"
-       prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("human", "{full_input}")
-        ])
-
-       final_prompt = prompt.invoke({"full_input": full_input})
-       response = llm.invoke(final_prompt)
-
-       SECTION_HISTORIES[section].append({"role": "user", "content": question})
-       SECTION_HISTORIES[section].append({"role": "assistant", "content": response.content})
-
+       if confident:
+           context = records
+       else:
+           with span("retrieval", section=context_type) as s:
+               docs = retriever.invoke(question)
+               context = format_docs(docs)
+               s.set(docs=len(docs), context_chars=len(context))
+           if records is not None:
+               context = f"Scheme records:\n{records}\n\nScheme documents:\n{context}"
+
+        # Final formatted input to LLM: precompiled system message, then context, history and question last
+       with span("prompt_assembly", section=context_type) as s:
+           full_input = f"Context:\n{context}\n\n{history_block}Question: {question}"
+           state["final_prompt"] = [system_message, HumanMessage(content=full_input)]
+           state["prompt_chars"] = len(system_message.content) + len(full_input)
+           s.set(prompt_chars=state["prompt_chars"])
+       return state
+
+    def record(state, response):
+       # Conversation history is owned by the caller's per-session memory; only the cache is updated here.
+       if state["cached"] is None and state["cache_vector"] is not None:
+           cache.put(state["cache_vector"], state["cache_bucket"], response)
+
+    def generate(state):
+       assemble(state)
+       with span("llm_invoke", section=context_type, prompt_chars=state["prompt_chars"]) as s:
+           response = state["llm"].invoke(state["final_prompt"])
+           s.set(response_chars=len(response.content))
+       record(state, response)
        return response
 
+    def rag_chain_fn(inputs):
+       state = prepare(inputs)
+       if state["cached"] is not None:
+           record(state, state["cached"])
+           return state["cached"]
+       if state["flight_key"] is not None:
+           # Identical questions already in flight share that retrieval and LLM call
+           parts = flights.stream(state["flight_key"], lambda: [generate(state).content])
+           return AIMessage(content="".join(parts))
+       return generate(state)
+
+    def rag_chain_stream(inputs):
+       # Yields answer text as the model produces it; history and cache are updated once the answer is complete.
+       state = prepare(inputs)
+       if state["cached"] is not None:
+           record(state, state["cached"])
+           yield state["cached"].content
+           return
+       if state["flight_key"] is not None:
+           yield from flights.stream(state["flight_key"], lambda: generate_stream(state))
+           return
+       yield from generate_stream(state)
+
+    def generate_stream(state):
+       assemble(state)
+       parts = []
+       with span("llm_stream", section=context_type, prompt_chars=state["prompt_chars"]) as s:
+           start = time.perf_counter()
+           for chunk in state["llm"].stream(state["final_prompt"]):
+               text = chunk.content if hasattr(chunk, "content") else chunk
+               if text:
+                   if not parts:
+                       observe("maya_time_to_first_token_seconds", time.perf_counter() - start, section=context_type)
+                   parts.append(text)
+                   yield text
+           s.set(response_chars=sum(len(p) for p in parts))
+       record(state, AIMessage(content="".join(parts)))
+
+    rag_chain_fn.stream = rag_chain_stream
     return rag_chain_fn
\ No newline at end of file
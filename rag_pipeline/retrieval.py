@@ -0,0 +1,155 @@
+# Hybrid retriever: a BM25 inverted index over the same chunks as the Chroma collection, fused with
+# dense results by reciprocal-rank fusion, optionally re-ranked by a small CPU cross-encoder, then
+# deduplicated and trimmed to a token budget before it goes into the prompt.
+
+import os
+import re
+import math
+import heapq
+from collections import Counter, defaultdict
+from langchain.schema import Document
+from modules.observability import get_logger
+from rag_pipeline.coalescing import MicroBatcher, BATCH_WINDOW_MS
+
+logger = get_logger("retrieval")
+
+RETRIEVAL_K = int(os.getenv("MAYA_RETRIEVAL_K", "4"))
+RETRIEVAL_CANDIDATES = int(os.getenv("MAYA_RETRIEVAL_CANDIDATES", "12"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("MAYA_CONTEXT_TOKENS", "1200"))
+RRF_K = 60
+RERANKER_MODEL = os.getenv("MAYA_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English; close enough for budgeting.
+    return max(1, len(text) // 4)
+
+
+class BM25Index:
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)   # term -> [(doc index, term frequency)]
+        self.doc_lengths = []
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        n_docs = len(self.doc_lengths)
+        self.avg_length = sum(self.doc_lengths) / n_docs if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def search(self, query, k):
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores, key=scores.get)
+
+
+def load_reranker():
+    # The cross-encoder is optional; without sentence-transformers the fused ranking is used as is.
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        logger.warning("sentence-transformers not installed, re-ranking disabled.")
+        return None
+    return CrossEncoder(RERANKER_MODEL, device="cpu")
+
+
+def _doc_key(doc):
+    return (doc.metadata.get("source"), " ".join(doc.page_content.split()))
+
+
+class HybridRetriever:
+
+    def __init__(self, vector_db, k=RETRIEVAL_K, candidates=RETRIEVAL_CANDIDATES,
+                 token_budget=CONTEXT_TOKEN_BUDGET, reranker=None, batch_window_ms=BATCH_WINDOW_MS):
+        self.vector_db = vector_db
+        self.k = k
+        self.candidates = candidates
+        self.token_budget = token_budget
+        self.reranker = reranker
+
+        stored = vector_db.get(include=["documents", "metadatas"])
+        self.docs = [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(stored["documents"], stored["metadatas"])
+        ]
+        self.bm25 = BM25Index([doc.page_content for doc in self.docs])
+        logger.info(f"BM25 index built over {len(self.docs)} chunks.")
+
+        # Concurrent questions share one embedding call and one Chroma query.
+        self.embeddings = getattr(vector_db, "_embedding_function", None)
+        self.batcher = None
+        if batch_window_ms > 0 and self.embeddings is not None and hasattr(vector_db, "_collection"):
+            self.batcher = MicroBatcher(self._dense_batch, window_ms=batch_window_ms, name="dense_search")
+
+    def _dense_batch(self, questions):
+        embed_queries = getattr(self.embeddings, "embed_queries", None)
+        vectors = embed_queries(questions) if embed_queries else self.embeddings.embed_documents(questions)
+        result = self.vector_db._collection.query(
+            query_embeddings=vectors,
+            n_results=min(self.candidates, len(self.docs)),
+            include=["documents", "metadatas"]
+        )
+        return [
+            [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+            for texts, metadatas in zip(result["documents"], result["metadatas"])
+        ]
+
+    def dense_search(self, question):
+        if not self.docs:
+            return []
+        if self.batcher is not None:
+            return self.batcher.submit(question)
+        return self.vector_db.similarity_search(question, k=self.candidates)
+
+    def _fuse(self, ranked_lists):
+        scores = defaultdict(float)
+        docs = {}
+        for ranked in ranked_lists:
+            for rank, doc in enumerate(ranked):
+                key = _doc_key(doc)
+                docs.setdefault(key, doc)
+                scores[key] += 1.0 / (RRF_K + rank + 1)
+        return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+    def _trim(self, docs):
+        selected = []
+        used = 0
+        for doc in docs:
+            cost = estimate_tokens(doc.page_content)
+            if selected and used + cost > self.token_budget:
+                break
+            selected.append(doc)
+            used += cost
+            if len(selected) >= self.k:
+                break
+        return selected
+
+    def invoke(self, question):
+        sparse = [self.docs[i] for i in self.bm25.search(question, self.candidates)]
+        fused = self._fuse([self.dense_search(question), sparse])
+
+        if self.reranker is not None and fused:
+            fused = fused[:self.candidates]
+            scores = self.reranker.predict([(question, doc.page_content) for doc in fused])
+            fused = [doc for _, doc in sorted(zip(scores, fused), key=lambda pair: pair[0], reverse=True)]
+
+        return self._trim(fused)